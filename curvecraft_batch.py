@@ -0,0 +1,271 @@
+"""Batch fitting of stroke files for the ``curvecraft fit`` command.
+
+Stroke files are read from disk, fitted with :mod:`curvecraft_engine` in a
+process pool and written to a JSON Lines file as results arrive. Supported
+inputs:
+
+* ``.csv``  - one stroke per file, one ``x,y`` row per point (header optional)
+* ``.npy``  - one stroke per file, an ``(N, 2)`` array
+* ``.jsonl`` - one stroke per line, either ``[[x, y], ...]`` or an object
+  with a ``points`` list and an optional ``id``
+
+JSON Lines files are split into batches of lines, so one large archive is
+spread across the pool and only a batch of its results is held at a time.
+
+An output path ending in ``.ccf`` gets a binary curve file instead (see
+:mod:`curvecraft_store`); strokes that fail to fit are reported on stderr.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from curvecraft_engine import (DEFAULT_HARMONICS, DEFAULT_RANGE, SIMPLIFY_METHODS,
+                               SPECTRUM_METHODS, fit_curve, select_harmonics)
+from curvecraft_store import STORE_EXTENSION, CurveWriter
+
+STROKE_EXTENSIONS = ('.csv', '.npy', '.jsonl')
+DEFAULT_TOLERANCE = 0.01
+BATCH_STROKES = 64  # JSON Lines strokes per pool task
+MAX_CHUNKSIZE = 8
+
+
+def stroke_batches(path, size=BATCH_STROKES):
+    """Split a JSON Lines file into spans of ``size`` lines.
+
+    Yields ``(start, stop, first_line)``: the byte range of the span and the
+    index of its first line, for :func:`read_strokes`.
+    """
+    with open(path, 'rb') as f:
+        start = offset = 0
+        first = i = 0
+        for i, line in enumerate(f, 1):
+            offset += len(line)
+            if i - first == size:
+                yield start, offset, first
+                start, first = offset, i
+        if i > first:
+            yield start, offset, first
+
+
+def read_strokes(path, span=None):
+    """Return a list of (stroke_id, points, error) triples stored in ``path``.
+
+    ``error`` is None, or a message (with ``points`` None) for a JSON Lines
+    line that isn't valid JSON or is an object without a ``points`` list, so
+    that stroke can be reported on its own and the rest of the file still
+    read. ``span`` limits a JSON Lines file to one of its
+    :func:`stroke_batches`.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return [(0, np.load(path), None)]
+    if ext == '.csv':
+        try:
+            points = np.loadtxt(path, delimiter=',', usecols=(0, 1), ndmin=2)
+        except ValueError:
+            points = np.loadtxt(path, delimiter=',', usecols=(0, 1), ndmin=2, skiprows=1)
+        return [(0, points, None)]
+    if ext == '.jsonl':
+        start, stop, first = span or (0, None, 0)
+        strokes = []
+        with open(path, 'rb') as f:
+            f.seek(start)
+            lines = (f.read() if stop is None else f.read(stop - start)).split(b'\n')
+            for i, line in enumerate(lines, first):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError as e:
+                    strokes.append((i, None, f"Invalid JSON on line {i + 1}: {e}"))
+                    continue
+                if not isinstance(item, dict):
+                    strokes.append((i, item, None))
+                elif item.get('points') is None:
+                    strokes.append((item.get('id', i), None, "Stroke has no 'points' list"))
+                else:
+                    strokes.append((item.get('id', i), item['points'], None))
+        return strokes
+    raise ValueError(f"Unsupported stroke file: {path}")
+
+
+def find_stroke_files(inputs):
+    """Expand files and directories into a sorted list of stroke files"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for dirpath, _, names in os.walk(item):
+                files.extend(os.path.join(dirpath, name) for name in names
+                             if name.lower().endswith(STROKE_EXTENSIONS))
+        else:
+            files.append(item)
+    return sorted(files)
+
+
+def fit_file(path, x_range=DEFAULT_RANGE, y_range=DEFAULT_RANGE, harmonics=DEFAULT_HARMONICS,
+             tolerance=DEFAULT_TOLERANCE, metric='rms', simplify='rdp', binary=False,
+             spectrum='spline', span=None):
+    """Fit every stroke in one file, or in one ``span`` of a JSON Lines file.
+
+    ``harmonics='auto'`` stores the fewest harmonics whose ``metric`` error
+    is within ``tolerance`` (see curvecraft_engine.select_harmonics).
+    Returns a list of (json_line, ok) pairs, one per stroke. Errors are
+    reported per stroke (or per file, if it can't be read) so one bad input
+    never aborts a batch. With ``binary=True`` the first item of each pair
+    is ``(record, fit, harmonics)`` for a CurveWriter instead of a JSON line;
+    ``fit`` is None for failed strokes.
+    """
+    auto = harmonics == 'auto'
+    try:
+        strokes = read_strokes(path, span)
+    except (OSError, ValueError, KeyError) as e:
+        record = {'source': path, 'stroke': None, 'error': str(e)}
+        return [((record, None, None) if binary else json.dumps(record), False)]
+
+    lines = []
+    for stroke_id, points, error in strokes:
+        record = {'source': path, 'stroke': stroke_id}
+        fit = keep = None
+        try:
+            if error:
+                raise ValueError(error)
+            fit = fit_curve(points, x_range, y_range, None if auto else harmonics, simplify, spectrum)
+            keep = DEFAULT_HARMONICS if auto else harmonics
+            if auto and fit.fourier is not None:
+                keep = select_harmonics(fit.fourier, tolerance, metric)
+            record['points'] = len(points)
+            if not binary:
+                record.update(fit.as_dict(keep))
+            ok = True
+        except (ValueError, TypeError, IndexError, KeyError) as e:
+            record['error'] = str(e)
+            fit = None
+            ok = False
+        lines.append(((record, fit, keep) if binary else json.dumps(record), ok))
+    return lines
+
+
+def _fit_file_task(task):
+    path, span, options = task
+    return fit_file(path, *options, span=span)
+
+
+def _file_spans(path):
+    if path.lower().endswith('.jsonl'):
+        try:
+            return list(stroke_batches(path))
+        except OSError:
+            pass  # reported by the worker that tries to read it
+    return [None]
+
+
+def fit_files(paths, output, workers=None, x_range=DEFAULT_RANGE, y_range=DEFAULT_RANGE,
+              harmonics=DEFAULT_HARMONICS, tolerance=DEFAULT_TOLERANCE, metric='rms',
+              simplify='rdp', chunksize=None, spectrum='spline'):
+    """Fit ``paths`` across ``workers`` processes, streaming records to ``output``.
+
+    ``output`` is an open text file or a CurveWriter. Each task is one file,
+    or one batch of a JSON Lines file; ``chunksize`` tasks are sent to a
+    worker at a time (by default as many as keeps every worker busy, up to
+    MAX_CHUNKSIZE). Returns (fitted, failed) stroke counts.
+    """
+    binary = isinstance(output, CurveWriter)
+    options = (x_range, y_range, harmonics, tolerance, metric, simplify, binary, spectrum)
+    tasks = [(path, span, options) for path in paths for span in _file_spans(path)]
+    fitted = failed = 0
+
+    def write(lines):
+        nonlocal fitted, failed
+        for line, ok in lines:
+            if not binary:
+                output.write(line + '\n')
+            elif ok:
+                record, fit, keep = line
+                output.add(fit, keep, record)
+            else:
+                print(json.dumps(line[0]), file=sys.stderr)
+            if ok:
+                fitted += 1
+            else:
+                failed += 1
+
+    if workers == 1:
+        for task in tasks:
+            write(_fit_file_task(task))
+    else:
+        if chunksize is None:
+            chunksize = max(1, min(MAX_CHUNKSIZE, len(tasks) // (4 * (workers or os.cpu_count()))))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for lines in pool.map(_fit_file_task, tasks, chunksize=chunksize):
+                write(lines)
+    return fitted, failed
+
+
+def harmonics_arg(value):
+    if value == 'auto':
+        return value
+    try:
+        harmonics = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer or 'auto', got {value!r}")
+    if harmonics < 0:
+        raise argparse.ArgumentTypeError(f"harmonics can't be negative, got {harmonics}")
+    return harmonics
+
+
+def add_arguments(parser):
+    parser.add_argument('inputs', nargs='+',
+                        help="stroke files or directories (.csv, .npy, .jsonl)")
+    parser.add_argument('-o', '--output', required=True,
+                        help=f"JSON Lines file to write results to, or a binary curve file"
+                             f" if it ends in {STORE_EXTENSION}")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: all CPUs)")
+    parser.add_argument('--harmonics', type=harmonics_arg, default=DEFAULT_HARMONICS,
+                        help="Fourier harmonics to store for closed curves, or 'auto'"
+                             " for the fewest meeting --tolerance")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"error tolerance for --harmonics auto (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument('--metric', choices=['rms', 'max'], default='rms',
+                        help="error measure for --harmonics auto (default: rms)")
+    parser.add_argument('--simplify', choices=SIMPLIFY_METHODS, default='rdp',
+                        help="how control points are picked from each stroke (default: rdp)")
+    parser.add_argument('--spectrum', choices=SPECTRUM_METHODS, default='spline',
+                        help="how closed curves' Fourier spectra are computed: from the spline"
+                             " (default), or fitted to the raw points by least squares (lstsq)"
+                             " or a non-uniform DFT (nudft)")
+    parser.add_argument('--x-range', type=float, default=DEFAULT_RANGE,
+                        help="half-width of the canvas, used for closed-curve detection")
+    parser.add_argument('--y-range', type=float, default=DEFAULT_RANGE,
+                        help="half-height of the canvas, used for closed-curve detection")
+
+
+def run(args):
+    paths = find_stroke_files(args.inputs)
+    if not paths:
+        print("No stroke files found", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    if args.output.lower().endswith(STORE_EXTENSION):
+        metadata = {'x_range': args.x_range, 'y_range': args.y_range, 'simplify': args.simplify,
+                    'spectrum': args.spectrum}
+        output = CurveWriter(args.output, metadata)
+    else:
+        output = open(args.output, 'w', encoding='utf-8')
+    with output:
+        fitted, failed = fit_files(paths, output, workers=args.workers,
+                                   x_range=args.x_range, y_range=args.y_range,
+                                   harmonics=args.harmonics, tolerance=args.tolerance,
+                                   metric=args.metric, simplify=args.simplify,
+                                   spectrum=args.spectrum)
+    elapsed = time.perf_counter() - start
+    print(f"Fitted {fitted} strokes from {len(paths)} files in {elapsed:.2f}s"
+          f" ({failed} failed) -> {args.output}", file=sys.stderr)
+    return 0
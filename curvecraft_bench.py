@@ -0,0 +1,334 @@
+"""Reproducible performance benchmarks for the CurveCraft pipeline.
+
+Runs headless on the Agg backend against synthetic strokes and writes the
+timings as JSON, so two runs (e.g. before and after a dependency upgrade)
+can be compared::
+
+    python curvecraft_bench.py run -o before.json
+    python curvecraft_bench.py run -o after.json
+    python curvecraft_bench.py compare before.json after.json --threshold 0.1
+
+Cases mirror the GUI's hot paths without needing a display:
+
+* ``smooth_points``      - smoothing and control point selection
+* ``process_stroke``     - the whole fit of a finished stroke (fit_curve)
+* ``stream_stroke``      - the same stroke fed to a StreamingFitter, then fitted
+* ``compute_fourier``    - the spectrum of a closed curve's splines
+* ``fit_fourier_points`` - the spectrum least-squares fitted to the raw points
+* ``render_curve``       - adaptive Fourier plot sampling plus an Agg redraw
+* ``update_equations_display`` - building the first page of equations text
+  and its tag indices
+* ``create_coefficients_table`` - coefficients, errors and one screen of rows
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import scipy
+
+from curvecraft_engine import (DEFAULT_HARMONICS, DEFAULT_RANGE, SIMPLIFY_TOLERANCE,
+                               POINT_HARMONICS, StreamingFitter, compute_fourier,
+                               fit_curve, fit_fourier_points, fourier_coefficients,
+                               fourier_plot_samples, is_closed_stroke, smooth_points,
+                               spline_plot_samples, truncation_errors)
+from curvecraft_format import (PAGE_SECTIONS, assemble, fourier_document, parametric_document,
+                               text_indices)
+
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_MIN_TIME = 0.2  # seconds of repeated runs per measurement
+DEFAULT_THRESHOLD = 0.10
+TABLE_ROWS = 12
+MOTION_CHUNK = 8  # points per simulated motion event batch
+SEED = 1234
+
+
+def _noise(rng, n, scale):
+    return rng.normal(scale=scale, size=(n, 2))
+
+
+def circle_stroke(n, rng):
+    """A closed circle, slightly noisy"""
+    th = np.linspace(0, 2 * np.pi, n)
+    return 0.8 * np.column_stack([np.cos(th), np.sin(th)]) + _noise(rng, n, 1e-3)
+
+
+def spiral_stroke(n, rng):
+    """An open spiral of three turns"""
+    th = np.linspace(0, 6 * np.pi, n)
+    r = 0.05 + 0.9 * th / th[-1]
+    return np.column_stack([r * np.cos(th), r * np.sin(th)]) + _noise(rng, n, 1e-3)
+
+
+def signature_stroke(n, rng):
+    """An open, looping left-to-right stroke like a handwritten signature"""
+    s = np.linspace(0, 1, n)
+    x = -1.0 + 2.0 * s + 0.15 * np.sin(14 * np.pi * s)
+    y = 0.3 * np.sin(4 * np.pi * s) + 0.25 * np.cos(14 * np.pi * s) * np.exp(-s)
+    return np.column_stack([x, y]) + _noise(rng, n, 1e-3)
+
+
+def scribble_stroke(n, rng):
+    """A closed random-harmonic loop with heavier noise"""
+    th = np.linspace(0, 2 * np.pi, n)
+    k = np.arange(1, 9)
+    amp = rng.normal(scale=0.25 / k, size=(4, len(k)))
+    phase = np.outer(th, k)
+    x = np.cos(th) * 0.6 + np.cos(phase) @ amp[0] + np.sin(phase) @ amp[1]
+    y = np.sin(th) * 0.6 + np.cos(phase) @ amp[2] + np.sin(phase) @ amp[3]
+    x -= np.linspace(0, x[-1] - x[0], n)
+    y -= np.linspace(0, y[-1] - y[0], n)
+    points = np.column_stack([x, y])
+    points *= 0.9 / np.abs(points).max()
+    return points + _noise(rng, n, 3e-3)
+
+
+STROKES = {
+    'circle': circle_stroke,
+    'spiral': spiral_stroke,
+    'signature': signature_stroke,
+    'scribble': scribble_stroke,
+}
+
+
+def make_stroke(kind, n, seed=SEED):
+    """Deterministic synthetic stroke of ``n`` points"""
+    return STROKES[kind](n, np.random.default_rng(seed))
+
+
+# Each case takes a stroke and returns a zero-argument callable to time, or
+# None if it doesn't apply (e.g. Fourier cases on open strokes). Anything
+# done before returning is setup and not timed.
+
+def case_smooth_points(points):
+    tolerance = SIMPLIFY_TOLERANCE * DEFAULT_RANGE
+    return lambda: smooth_points(points, 'rdp', tolerance)
+
+
+def case_process_stroke(points):
+    return lambda: fit_curve(points)
+
+
+def case_stream_stroke(points):
+    def run():
+        fitter = StreamingFitter()
+        for i in range(0, len(points), MOTION_CHUNK):
+            fitter.extend(points[i:i + MOTION_CHUNK])
+        return fitter.fit()
+    return run
+
+
+def case_compute_fourier(points):
+    fit = fit_curve(points)
+    if not fit.is_closed:
+        return None
+    return lambda: compute_fourier(fit.x_spline, fit.y_spline)
+
+
+def case_fit_fourier_points(points):
+    if not is_closed_stroke(points):
+        return None
+    return lambda: fit_fourier_points(points, POINT_HARMONICS, 'lstsq')
+
+
+def case_render_curve(points):
+    fit = fit_curve(points)
+    if not fit.is_closed:
+        return None
+    fig, ax = plt.subplots(figsize=(5, 5))
+    fourier_line, = ax.plot([], [], color='#e53935', linewidth=3)
+    ax.set_xlim(-DEFAULT_RANGE, DEFAULT_RANGE)
+    ax.set_ylim(-DEFAULT_RANGE, DEFAULT_RANGE)
+    scale = ax.bbox.width / (2 * DEFAULT_RANGE)
+    original_line, = ax.plot(*spline_plot_samples(fit.x_spline, fit.y_spline, scale), linestyle='--')
+
+    def run():
+        fourier_line.set_data(*fourier_plot_samples(fit.fourier, DEFAULT_HARMONICS, scale))
+        fig.canvas.draw()
+    return run
+
+
+def case_update_equations_display(points):
+    fit = fit_curve(points)
+
+    def run():
+        documents = [parametric_document(fit.t, fit.x_spline, fit.y_spline, fit.is_closed)]
+        if fit.is_closed:
+            documents.append(fourier_document(fit.fourier, DEFAULT_HARMONICS))
+        for document in documents:
+            chunks = document.head + document.sections(0, PAGE_SECTIONS) + document.tail
+            text, ranges = assemble(chunks)
+            text_indices(text, ranges)
+    return run
+
+
+def case_create_coefficients_table(points):
+    fit = fit_curve(points)
+    if not fit.is_closed:
+        return None
+
+    def run():
+        coefficients = fourier_coefficients(fit.fourier, DEFAULT_HARMONICS)
+        rms, _ = truncation_errors(fit.fourier)
+        columns = (*coefficients, rms)
+        return [[f"{k}"] + [f"{c[k]:.8f}" for c in columns]
+                for k in range(min(TABLE_ROWS, len(coefficients[0])))]
+    return run
+
+
+CASES = {
+    'smooth_points': case_smooth_points,
+    'process_stroke': case_process_stroke,
+    'stream_stroke': case_stream_stroke,
+    'compute_fourier': case_compute_fourier,
+    'fit_fourier_points': case_fit_fourier_points,
+    'render_curve': case_render_curve,
+    'update_equations_display': case_update_equations_display,
+    'create_coefficients_table': case_create_coefficients_table,
+}
+
+
+def measure(func, min_time=DEFAULT_MIN_TIME, max_runs=1000):
+    """Time ``func`` repeatedly for at least ``min_time`` seconds (and once more
+    than a single warm-up run), returning per-run statistics in seconds"""
+    func()
+    times = []
+    total = 0.0
+    while (total < min_time or len(times) < 1) and len(times) < max_runs:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    times = np.array(times)
+    return {
+        'runs': len(times),
+        'min_s': float(times.min()),
+        'median_s': float(np.median(times)),
+        'mean_s': float(times.mean()),
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'matplotlib': matplotlib.__version__,
+        'backend': matplotlib.get_backend(),
+        'seed': SEED,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def run_benchmarks(cases=tuple(CASES), strokes=tuple(STROKES), sizes=DEFAULT_SIZES,
+                   min_time=DEFAULT_MIN_TIME, log=None):
+    """Run every case on every stroke and size, returning the JSON-ready report"""
+    results = []
+    for kind in strokes:
+        for n in sizes:
+            points = make_stroke(kind, n)
+            for name in cases:
+                try:
+                    func = CASES[name](points)
+                except ValueError:
+                    func = None
+                if func is None:
+                    continue
+                stats = measure(func, min_time)
+                results.append({'case': name, 'stroke': kind, 'points': n, **stats})
+                plt.close('all')
+                if log:
+                    print(f"{name:28s} {kind:10s} {n:>9d}  {stats['median_s'] * 1e3:10.3f} ms"
+                          f"  ({stats['runs']} runs)", file=log)
+    return {'environment': environment(), 'results': results}
+
+
+def _key(result):
+    return result['case'], result['stroke'], result['points']
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, stat='median_s'):
+    """Match results by (case, stroke, points) and return comparison rows.
+
+    Each row is (key, baseline time, current time, ratio, regressed), where a
+    regression is a slowdown by more than ``threshold`` (0.1 = 10%).
+    """
+    base = {_key(r): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        key = _key(result)
+        if key not in base:
+            continue
+        before, after = base[key][stat], result[stat]
+        ratio = after / before if before > 0 else float('inf')
+        rows.append((key, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _parse_sizes(value):
+    return [int(float(size)) for size in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='curvecraft_bench', description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="run the benchmarks and write JSON")
+    run_parser.add_argument('-o', '--output', help="JSON file to write (default: stdout)")
+    run_parser.add_argument('--cases', type=lambda v: v.split(','), default=list(CASES),
+                            help="comma-separated cases (default: all)")
+    run_parser.add_argument('--strokes', type=lambda v: v.split(','), default=list(STROKES),
+                            help="comma-separated stroke kinds (default: all)")
+    run_parser.add_argument('--sizes', type=_parse_sizes, default=list(DEFAULT_SIZES),
+                            help="comma-separated point counts (default: 10 to 1e6)")
+    run_parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                            help=f"seconds to repeat each measurement (default: {DEFAULT_MIN_TIME})")
+
+    compare_parser = subparsers.add_parser('compare', help="compare two benchmark JSON files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="slowdown that counts as a regression (default: 0.1 = 10%%)")
+    compare_parser.add_argument('--stat', choices=['median_s', 'min_s', 'mean_s'], default='median_s')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        unknown = set(args.cases) - set(CASES) | set(args.strokes) - set(STROKES)
+        if unknown:
+            parser.error(f"unknown cases or strokes: {', '.join(sorted(unknown))}")
+        report = run_benchmarks(args.cases, args.strokes, args.sizes, args.min_time, log=sys.stderr)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+        return 0
+
+    rows = compare(_load(args.baseline), _load(args.current), args.threshold, args.stat)
+    regressions = 0
+    for (case, stroke, points), before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{case:28s} {stroke:10s} {points:>9d}  {before * 1e3:10.3f} -> {after * 1e3:10.3f} ms"
+              f"  {ratio:6.2f}x  {flag}")
+    print(f"{len(rows)} measurements compared, {regressions} regressed by more than "
+          f"{args.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
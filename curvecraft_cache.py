@@ -0,0 +1,123 @@
+"""Bounded LRU cache for artifacts derived from a fitted stroke.
+
+Keys start with the stroke's content hash (see :func:`stroke_digest`) plus
+whatever parameters the artifact depends on, e.g.
+``('fourier_xy', curve_key, harmonics)``, so revisiting a view or a harmonic
+count is a lookup instead of a recomputation. Memory is bounded by the
+estimated size of the cached values, not by the number of entries, and hit,
+miss and eviction counts are kept for the timing overlay.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def stroke_digest(points):
+    """Content hash of an (N, 2) stroke, stable across runs"""
+    points = np.ascontiguousarray(points, dtype=float)
+    return hashlib.blake2b(points.tobytes(), digest_size=16).hexdigest()
+
+
+def estimate_size(value):
+    """Rough size of ``value`` in bytes.
+
+    Arrays count their buffers, containers their items, and objects may
+    report their own estimate through an ``nbytes`` attribute.
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Least-recently-used cache bounded by the total estimated size of its values.
+
+    Safe to share between the Tk thread and worker threads. A value larger
+    than the whole budget is returned to the caller but not stored.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        """The cached value for ``key``, computing and storing it on a miss.
+
+        ``compute`` runs outside the lock, so two threads missing on the same
+        key may both compute it; the later result wins.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def discard(self, match):
+        """Drop every entry whose key satisfies ``match(key)``"""
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,908 @@
+"""Headless curve-fitting engine for CurveCraft.
+
+This module holds the stroke pipeline used by the GUI: Savitzky-Golay
+smoothing, arc-length parameterization, cubic splines (periodic for closed
+curves) and the FFT-based Fourier spectrum. It depends only on NumPy and SciPy, so it can
+fit strokes on machines without a display. SciPy takes about a second to
+import, so it is imported on first use (or by :func:`preload`) rather than
+with this module.
+"""
+import heapq
+import importlib
+import math
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from curvecraft_profile import stage
+
+DEFAULT_RANGE = 1.2
+DEFAULT_HARMONICS = 15
+MAX_HARMONICS = 2000
+MIN_FOURIER_SAMPLES = 64
+MAX_FOURIER_SAMPLES = 16384
+SAMPLES_PER_SEGMENT = 8
+SAMPLES_PER_RADIAN = 16
+CURVATURE_PROBES_PER_SEGMENT = 16
+ALIAS_TOLERANCE = 1e-4  # of the curve's RMS size
+ALIAS_DOUBLINGS = 2
+CLOSED_THRESHOLD = 0.1  # fraction of the axis range
+CONTROL_POINTS = 25
+SIMPLIFY_TOLERANCE = 0.005  # fraction of the smaller axis range
+SMOOTH_WINDOW = 11
+SMOOTH_POLYORDER = 3
+STREAM_STEP = 32  # raw points per incremental smoothing pass
+STREAM_BLOCK = 256  # smoothed points per incremental simplification pass
+BASIS_CACHE_SIZE = 8
+BASIS_MAX_ELEMENTS = 4_000_000  # larger bases are built per chunk, not cached
+POINT_HARMONICS = 64  # harmonics fitted by default when the spectrum comes from raw points
+SPECTRUM_METHODS = ('spline', 'lstsq', 'nudft')
+PLOT_TOLERANCE = 0.5  # pixels between a plotted polyline and the curve
+PLOT_MIN_SAMPLES = 32
+PLOT_MAX_DEPTH = 12  # interval halvings below the seed grid
+
+_basis_cache = {}
+_basis_lock = threading.Lock()
+
+
+class CurveFit:
+    """Fitted representation of a single stroke.
+
+    ``t``, ``x`` and ``y`` are the control points, ``x_spline`` and
+    ``y_spline`` the cubic splines through them, and ``fourier`` the
+    spectrum dict (``x_fft``, ``y_fft``, ``n``) for closed curves, or None.
+    """
+
+    def __init__(self, t, x, y, x_spline, y_spline, is_closed, fourier=None):
+        self.t = t
+        self.x = x
+        self.y = y
+        self.x_spline = x_spline
+        self.y_spline = y_spline
+        self.is_closed = is_closed
+        self.fourier = fourier
+
+    @property
+    def n_segments(self):
+        return len(self.t) - 1
+
+    @property
+    def nbytes(self):
+        """Bytes held by the control points, spline coefficients and spectrum"""
+        arrays = [self.t, self.x, self.y, self.x_spline.c, self.x_spline.x,
+                  self.y_spline.c, self.y_spline.x]
+        if self.fourier is not None:
+            arrays += [value for value in self.fourier.values() if isinstance(value, np.ndarray)]
+        return sum(np.asarray(array).nbytes for array in arrays)
+
+    def as_dict(self, harmonics=DEFAULT_HARMONICS):
+        """JSON-friendly summary: knots, spline coefficients and Fourier terms"""
+        result = {
+            'closed': self.is_closed,
+            't': self.t.tolist(),
+            'x_spline': self.x_spline.c.tolist(),
+            'y_spline': self.y_spline.c.tolist(),
+            'fourier': None,
+        }
+        if self.fourier is not None:
+            harmonics = min(harmonics, max_harmonics(self.fourier))
+            a, b, c, d = fourier_coefficients(self.fourier, harmonics)
+            rms, max_bound = truncation_errors(self.fourier)
+            result['fourier'] = {
+                'n': self.fourier['n'],
+                'alias_error': self.fourier['alias_error'],
+                'harmonics': harmonics,
+                'rms_error': float(rms[harmonics]),
+                'max_error': float(max_bound[harmonics]),
+                'a': a.tolist(), 'b': b.tolist(), 'c': c.tolist(), 'd': d.tolist(),
+            }
+        return result
+
+    def __repr__(self):
+        kind = 'closed' if self.is_closed else 'open'
+        return f"CurveFit({kind}, {self.n_segments} segments)"
+
+
+class StrokeBuffer:
+    """Growable, contiguous (N, 2) float64 buffer of stroke points.
+
+    Storage doubles when full, so appends are amortized O(1), and ``points``
+    (or ``np.asarray(buffer)``) returns a zero-copy view of the filled rows.
+    Views are only valid until the next append that grows the buffer.
+    """
+
+    def __init__(self, capacity=1024):
+        self._data = np.empty((max(1, capacity), 2))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return self._data[:self._size][index]
+
+    def __array__(self, dtype=None, copy=None):
+        points = self._data[:self._size]
+        if dtype is not None and np.dtype(dtype) != points.dtype:
+            return points.astype(dtype)
+        return points.copy() if copy else points
+
+    @property
+    def points(self):
+        return self._data[:self._size]
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def _reserve(self, size):
+        if size > len(self._data):
+            data = np.empty((max(size, 2 * len(self._data)), 2))
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+
+    def append(self, x, y):
+        if self._size == len(self._data):
+            self._reserve(self._size + 1)
+        self._data[self._size] = x, y
+        self._size += 1
+
+    def extend(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self._reserve(self._size + len(points))
+        self._data[self._size:self._size + len(points)] = points
+        self._size += len(points)
+
+    def clear(self):
+        self._size = 0
+
+
+def preload():
+    """Import the SciPy modules the pipeline uses, e.g. from a background thread
+    so the first stroke doesn't wait for them"""
+    for name in ('scipy.fft', 'scipy.interpolate', 'scipy.signal'):
+        importlib.import_module(name)
+
+
+def _segment_distances(p, a, b):
+    """Distance from each point in ``p`` to the segment from ``a`` to ``b``"""
+    ab = b - a
+    length_sq = np.einsum('ij,ij->i', ab, ab)
+    proj = np.einsum('ij,ij->i', p - a, ab) / np.where(length_sq > 0, length_sq, 1.0)
+    closest = a + np.clip(proj, 0.0, 1.0)[:, None] * ab
+    return np.hypot(*(p - closest).T)
+
+
+def simplify_rdp(points, tolerance):
+    """Ramer-Douglas-Peucker simplification, returning the indices to keep.
+
+    Iterative and level-synchronous: every pass splits all open spans at
+    once, measuring all their interior points in a single vectorized step,
+    so the Python loop runs once per recursion depth rather than per span.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    starts, ends = np.array([0]), np.array([n - 1])
+
+    while len(starts):
+        lengths = ends - starts - 1
+        open_spans = lengths > 0
+        starts, ends, lengths = starts[open_spans], ends[open_spans], lengths[open_spans]
+        if not len(starts):
+            break
+
+        first = np.cumsum(lengths) - lengths
+        span = np.repeat(np.arange(len(starts)), lengths)
+        idx = starts[span] + 1 + np.arange(lengths.sum()) - first[span]
+        d = _segment_distances(points[idx], points[starts[span]], points[ends[span]])
+
+        d_max = np.maximum.reduceat(d, first)
+        at_max = np.flatnonzero(d == d_max[span])
+        _, first_max = np.unique(span[at_max], return_index=True)
+        split = idx[at_max[first_max]]
+
+        refine = d_max > tolerance
+        split = split[refine]
+        keep[split] = True
+        starts = np.concatenate([starts[refine], split])
+        ends = np.concatenate([split, ends[refine]])
+    return np.flatnonzero(keep)
+
+
+def simplify_visvalingam(points, tolerance):
+    """Visvalingam-Whyatt simplification, returning the indices to keep.
+
+    Repeatedly removes the point whose triangle with its neighbours has the
+    smallest area, while that area is below ``tolerance**2``. A heap with
+    lazy invalidation and linked neighbours keeps this O(n log n); only the
+    initial areas are vectorized. Each kept segment carries a bound on how
+    far the points removed beneath it lie from it, and a removal that would
+    push that bound past ``tolerance`` is refused, so the result stays
+    within ``tolerance`` of the stroke like RDP's does.
+    """
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    threshold = tolerance**2
+    p = np.asarray(points, dtype=float)
+    initial = 0.5 * np.abs((p[1:-1, 0] - p[:-2, 0]) * (p[2:, 1] - p[:-2, 1]) -
+                           (p[2:, 0] - p[:-2, 0]) * (p[1:-1, 1] - p[:-2, 1]))
+    x, y = p[:, 0].tolist(), p[:, 1].tolist()
+    area = [np.inf] + initial.tolist() + [np.inf]
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    error = [0.0] * n  # bound for the segment ending at each kept point
+    keep = [True] * n
+    heap = [(a, i) for i, a in enumerate(area) if a < threshold]
+    heapq.heapify(heap)
+    push, pop = heapq.heappush, heapq.heappop
+
+    while heap:
+        a, i = pop(heap)
+        if not keep[i] or a != area[i]:
+            continue
+        before, after = prev[i], nxt[i]
+        # Distance from the point to the segment that would replace it
+        bx, by = x[after] - x[before], y[after] - y[before]
+        px, py = x[i] - x[before], y[i] - y[before]
+        length_sq = bx * bx + by * by
+        t = min(max((px * bx + py * by) / length_sq, 0.0), 1.0) if length_sq > 0 else 0.0
+        bound = max(error[i], error[after]) + math.hypot(px - t * bx, py - t * by)
+        if bound > tolerance:
+            continue
+        keep[i] = False
+        error[after] = bound
+        nxt[before], prev[after] = after, before
+        for j in (before, after):
+            if 0 < j < n - 1:
+                k, m = prev[j], nxt[j]
+                new = 0.5 * abs((x[j] - x[k]) * (y[m] - y[k]) - (x[m] - x[k]) * (y[j] - y[k]))
+                area[j] = new = max(a, new)
+                if new < threshold:
+                    push(heap, (new, j))
+    return np.flatnonzero(keep)
+
+
+SIMPLIFIERS = {
+    'rdp': simplify_rdp,
+    'visvalingam': simplify_visvalingam,
+}
+SIMPLIFY_METHODS = ('rdp', 'visvalingam', 'stride')
+
+
+def smooth_points(points, method='rdp', tolerance=SIMPLIFY_TOLERANCE * DEFAULT_RANGE):
+    """Smooth a stroke and reduce it to control points.
+
+    ``method`` selects the simplification: ``'rdp'`` or ``'visvalingam'``
+    keep the points needed to stay within ``tolerance`` of the smoothed
+    stroke, so corners survive and straight runs collapse; ``'stride'``
+    keeps every Nth point for roughly 25 control points.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) < 10:
+        return points
+    if method not in SIMPLIFY_METHODS:
+        raise ValueError(f"Unknown simplification method: {method!r}")
+    with stage('smooth'):
+        try:
+            window = min(SMOOTH_WINDOW, len(points) if len(points) % 2 == 1 else len(points) - 1)
+            from scipy.signal import savgol_filter
+            x_smooth = savgol_filter(points[:, 0], window_length=window, polyorder=SMOOTH_POLYORDER)
+            y_smooth = savgol_filter(points[:, 1], window_length=window, polyorder=SMOOTH_POLYORDER)
+            smoothed = np.column_stack([x_smooth, y_smooth])
+        except ValueError:
+            smoothed = points
+    with stage('simplify'):
+        if method == 'stride':
+            return smoothed[::max(1, len(smoothed) // CONTROL_POINTS)]
+        return smoothed[SIMPLIFIERS[method](smoothed, tolerance)]
+
+
+def is_closed_stroke(points, x_range=DEFAULT_RANGE, y_range=DEFAULT_RANGE):
+    """A stroke is closed when it ends near its start, scaled by the axis ranges"""
+    first, last = points[0], points[-1]
+    x_close = abs(first[0] - last[0]) < CLOSED_THRESHOLD * x_range
+    y_close = abs(first[1] - last[1]) < CLOSED_THRESHOLD * y_range
+    return bool(x_close and y_close)
+
+
+def arc_length_parameterize(points):
+    """Map points to t in [0, 1] proportional to cumulative arc length"""
+    distances = np.sqrt(np.sum(np.diff(points, axis=0)**2, axis=1))
+    cumulative = np.concatenate([[0], np.cumsum(distances)])
+    total = cumulative[-1]
+    return cumulative / total if total > 0 else np.linspace(0, 1, len(points))
+
+
+def fourier_sample_count(x_spline, y_spline, harmonics=0):
+    """Resample size for the Fourier path, chosen from the curve's complexity.
+
+    Takes the largest of a floor, a few samples per spline segment, a few
+    samples per radian of total turning (integrated |curvature|) and what
+    ``harmonics`` needs, then rounds up to an FFT-friendly length.
+    """
+    segments = len(x_spline.x) - 1
+    t_probe = np.linspace(0, 1, CURVATURE_PROBES_PER_SEGMENT * segments + 1)
+    dx, dy = x_spline(t_probe, 1), y_spline(t_probe, 1)
+    ddx, ddy = x_spline(t_probe, 2), y_spline(t_probe, 2)
+    speed_sq = dx**2 + dy**2
+    turning_rate = np.abs(dx * ddy - dy * ddx) / np.where(speed_sq > 0, speed_sq, np.inf)
+    total_turning = np.mean(turning_rate)  # integral over t in [0, 1]
+
+    n = max(MIN_FOURIER_SAMPLES,
+            SAMPLES_PER_SEGMENT * segments,
+            int(np.ceil(SAMPLES_PER_RADIAN * total_turning)),
+            2 * harmonics + 2)
+    from scipy.fft import next_fast_len
+    return min(next_fast_len(n, real=True), MAX_FOURIER_SAMPLES)
+
+
+def max_harmonics(fourier):
+    """Highest harmonic a spectrum can represent without reaching Nyquist.
+
+    Spectra loaded from a curve file only hold the harmonics that were stored.
+    """
+    return min(fourier['n'] // 2 - 1, len(fourier['x_fft']) - 1)
+
+
+def aliasing_error(fourier):
+    """RMS point distance carried by the top quarter of the spectrum.
+
+    For a well-resolved curve this band is essentially empty; energy there
+    means the sampling is too coarse and higher frequencies fold back.
+    """
+    n = fourier['n']
+    band = slice(n // 4 + 1, n // 2)
+    power = np.abs(fourier['x_fft'][band])**2 + np.abs(fourier['y_fft'][band])**2
+    return float(np.sqrt(2 * np.sum(power)) / n)
+
+
+def compute_fourier(x_spline, y_spline, n=None, harmonics=0):
+    """Resample the splines uniformly in t and return their real spectra.
+
+    With ``n=None`` the sample count is chosen by :func:`fourier_sample_count`
+    and doubled (a bounded number of times) while :func:`aliasing_error`
+    exceeds ``ALIAS_TOLERANCE`` of the curve's size. Doubling stops early
+    when it barely reduces the error: a slowly decaying tail comes from a
+    discontinuity, which more samples cannot resolve. The dict holds the
+    ``rfft`` of x and y, the effective ``n`` and its ``alias_error``.
+    """
+    adaptive = n is None
+    if adaptive:
+        n = fourier_sample_count(x_spline, y_spline, harmonics)
+
+    previous_error = None
+    for attempt in range(ALIAS_DOUBLINGS + 1):
+        t_sample = np.linspace(0, 1, n, endpoint=False)
+        x_sample, y_sample = x_spline(t_sample), y_spline(t_sample)
+        fourier = {
+            'x_fft': np.fft.rfft(x_sample),
+            'y_fft': np.fft.rfft(y_sample),
+            'n': n
+        }
+        fourier['alias_error'] = aliasing_error(fourier)
+        if not adaptive or n >= MAX_FOURIER_SAMPLES:
+            break
+        size = np.sqrt(np.mean((x_sample - x_sample.mean())**2 + (y_sample - y_sample.mean())**2))
+        if fourier['alias_error'] <= ALIAS_TOLERANCE * size:
+            break
+        if previous_error is not None and fourier['alias_error'] > previous_error / 4:
+            break
+        previous_error = fourier['alias_error']
+        from scipy.fft import next_fast_len
+        n = min(next_fast_len(2 * n, real=True), MAX_FOURIER_SAMPLES)
+    return fourier
+
+
+def fourier_coefficients(fourier, harmonics):
+    """Real coefficients (a, b, c, d) for k = 0..harmonics.
+
+    ``a``/``b`` are the cosine/sine terms of x(t), ``c``/``d`` those of y(t);
+    index 0 holds the constant term and its sine entries are zero.
+    """
+    n = fourier['n']
+    x_fft = fourier['x_fft'][:harmonics + 1]
+    y_fft = fourier['y_fft'][:harmonics + 1]
+    scale = np.full(len(x_fft), 2.0 / n)
+    scale[0] = 1.0 / n
+    a = scale * np.real(x_fft)
+    b = -scale * np.imag(x_fft)
+    c = scale * np.real(y_fft)
+    d = -scale * np.imag(y_fft)
+    b[0] = d[0] = 0.0
+    return a, b, c, d
+
+
+def truncation_errors(fourier):
+    """Reconstruction error of the sampled curve for every truncation level.
+
+    Returns ``(rms, max_bound)`` arrays indexed by harmonic count h = 0..n//2.
+    ``rms[h]`` is the exact RMS point distance between the n samples and the
+    series truncated at h, from Parseval's theorem (cumulative tail energy of
+    the spectrum). ``max_bound[h]`` bounds the maximum point distance by the
+    sum of the remaining harmonic amplitudes. Both are computed in one pass.
+    For a truncated spectrum the errors are relative to the stored terms.
+    """
+    n = fourier['n']
+    half = min(n // 2 + 1, len(fourier['x_fft']))
+    x_fft = fourier['x_fft'][:half]
+    y_fft = fourier['y_fft'][:half]
+    power = np.abs(x_fft)**2 + np.abs(y_fft)**2
+
+    weights = np.full(half, 2.0)
+    weights[0] = 1.0
+    if n % 2 == 0 and half == n // 2 + 1:
+        weights[-1] = 1.0
+    tail_energy = np.concatenate([np.cumsum((weights * power)[:0:-1])[::-1], [0.0]])
+    rms = np.sqrt(tail_energy) / n
+
+    amplitude = weights * np.sqrt(power) / n
+    max_bound = np.concatenate([np.cumsum(amplitude[:0:-1])[::-1], [0.0]])
+    return rms, max_bound
+
+
+def select_harmonics(fourier, tolerance, metric='rms', min_harmonics=1):
+    """Smallest harmonic count whose reconstruction error is within ``tolerance``.
+
+    ``metric`` is ``'rms'`` or ``'max'`` (see :func:`truncation_errors`). If no
+    truncation meets the tolerance the spectrum's maximum is returned.
+    """
+    if metric not in ('rms', 'max'):
+        raise ValueError(f"Unknown error metric: {metric!r}")
+    rms, max_bound = truncation_errors(fourier)
+    errors = (rms if metric == 'rms' else max_bound)[:max_harmonics(fourier) + 1]
+    within = np.flatnonzero(errors[min_harmonics:] <= tolerance)
+    return int(min_harmonics + within[0]) if len(within) else max_harmonics(fourier)
+
+
+def _build_basis(t, harmonics):
+    # Powers of exp(2πit) by repeated multiplication: one complex product per
+    # entry instead of a cos and a sin, with rounding error around k * 1e-16
+    basis = np.empty((len(t), 2 * harmonics + 1))
+    basis[:, 0] = 1.0
+    if harmonics:
+        rotation = np.exp(2j * np.pi * t)
+        powers = np.cumprod(np.broadcast_to(rotation[:, None], (len(t), harmonics)), axis=1)
+        basis[:, 1::2] = powers.real
+        basis[:, 2::2] = powers.imag
+    return basis
+
+
+def fourier_basis(t, harmonics, cache=True):
+    """Basis matrix with columns [1, cos(2πt), sin(2πt), cos(4πt), sin(4πt), ...].
+
+    Columns are interleaved per harmonic, so the first ``2*h + 1`` columns of
+    a basis built for ``harmonics`` serve any ``h <= harmonics``. Bases are
+    cached per sample vector and grown geometrically, which makes repeated
+    evaluation on the same ``t`` (e.g. while dragging the harmonics slider)
+    a single matrix product. Pass ``cache=False`` for one-off sample vectors.
+    """
+    t = np.ascontiguousarray(t, dtype=float)
+    if not cache:
+        return _build_basis(t, harmonics)
+    key = (len(t), t.tobytes())
+    with _basis_lock:
+        basis = _basis_cache.get(key)
+        if basis is None or basis.shape[1] < 2 * harmonics + 1:
+            capacity = harmonics if basis is None else max(harmonics, basis.shape[1] - 1)
+            basis = _build_basis(t, capacity)
+            if len(_basis_cache) >= BASIS_CACHE_SIZE:
+                _basis_cache.pop(next(iter(_basis_cache)))
+            _basis_cache[key] = basis
+    return basis[:, :2 * harmonics + 1]
+
+
+def evaluate_fourier(coeffs, t, harmonics, cache=True):
+    """Evaluate the truncated Fourier series of a spectrum at parameters ``t``.
+
+    ``coeffs`` is a spectrum dict as returned by :func:`compute_fourier`.
+    Returns (x, y) arrays shaped like ``t``. ``cache`` is passed on to
+    :func:`fourier_basis`.
+    """
+    a, b, c, d = fourier_coefficients(coeffs, harmonics)
+    harmonics = len(a) - 1
+    weights = np.empty((2 * harmonics + 1, 2))
+    weights[0] = a[0], c[0]
+    weights[1::2, 0], weights[1::2, 1] = a[1:], c[1:]
+    weights[2::2, 0], weights[2::2, 1] = b[1:], d[1:]
+
+    t = np.asarray(t, dtype=float)
+    flat = t.ravel()
+    if flat.size * weights.shape[0] <= BASIS_MAX_ELEMENTS:
+        xy = fourier_basis(flat, harmonics, cache) @ weights
+    else:
+        chunk = max(1, BASIS_MAX_ELEMENTS // weights.shape[0])
+        xy = np.concatenate([_build_basis(flat[i:i + chunk], harmonics) @ weights
+                             for i in range(0, flat.size, chunk)])
+    return xy[:, 0].reshape(t.shape), xy[:, 1].reshape(t.shape)
+
+
+def refine_samples(evaluate, t, xy, scale, tolerance=PLOT_TOLERANCE, max_depth=PLOT_MAX_DEPTH):
+    """Refine and thin existing samples until their polyline is within ``tolerance`` pixels.
+
+    ``t`` is an increasing parameter array with the curve's points ``xy``
+    (shape (N, 2)) already evaluated, ``evaluate`` maps further parameters
+    to (x, y) arrays and ``scale`` is pixels per data unit (a number, or one
+    per axis). Every interval whose midpoint lies more than half the
+    tolerance off its chord is halved, level by level with one vectorized
+    evaluation per level; the refined polyline is then thinned by RDP with
+    the other half of the tolerance, so flat stretches keep only their ends.
+    Returns the kept (t, xy).
+    """
+    scale = np.broadcast_to(np.asarray(scale, dtype=float), (2,))
+    samples, values = [t], [xy]
+    start, end = t[:-1], t[1:]
+    a, b = xy[:-1] * scale, xy[1:] * scale
+
+    for _ in range(max_depth):
+        if not len(start):
+            break
+        mid = 0.5 * (start + end)
+        xy = np.column_stack(evaluate(mid))
+        samples.append(mid)
+        values.append(xy)
+        m = xy * scale
+        split = _segment_distances(m, a, b) > 0.5 * tolerance
+        start, end = np.concatenate([start[split], mid[split]]), np.concatenate([mid[split], end[split]])
+        a, b = np.concatenate([a[split], m[split]]), np.concatenate([m[split], b[split]])
+
+    t = np.concatenate(samples)
+    order = np.argsort(t, kind='stable')
+    t, xy = t[order], np.concatenate(values)[order]
+    keep = simplify_rdp(xy * scale, 0.5 * tolerance)
+    return t[keep], xy[keep]
+
+
+def adaptive_samples(evaluate, scale, tolerance=PLOT_TOLERANCE, seeds=None,
+                     max_depth=PLOT_MAX_DEPTH):
+    """Sample a curve on t in [0, 1] densely enough to plot it within ``tolerance`` pixels.
+
+    Starts from an even grid plus ``seeds`` (e.g. spline knots) and hands it
+    to :func:`refine_samples`. Returns (x, y).
+    """
+    t = np.linspace(0.0, 1.0, PLOT_MIN_SAMPLES + 1)
+    if seeds is not None:
+        t = np.union1d(t, np.clip(seeds, 0.0, 1.0))
+    _, xy = refine_samples(evaluate, t, np.column_stack(evaluate(t)), scale, tolerance, max_depth)
+    return xy[:, 0], xy[:, 1]
+
+
+def spline_seeds(x_spline):
+    """Seed parameters for plotting a spline: its knots and segment midpoints"""
+    knots = x_spline.x
+    return np.concatenate([knots, 0.5 * (knots[1:] + knots[:-1])])
+
+
+def spline_plot_samples(x_spline, y_spline, scale, tolerance=PLOT_TOLERANCE):
+    """Adaptive plot samples of a parametric spline"""
+    return adaptive_samples(lambda t: (x_spline(t), y_spline(t)), scale, tolerance,
+                            spline_seeds(x_spline))
+
+
+def fourier_plot_samples(coeffs, harmonics, scale, tolerance=PLOT_TOLERANCE):
+    """Adaptive plot samples of a truncated Fourier series.
+
+    The seed grid has four points per period of the highest harmonic, so no
+    oscillation falls between seeds unprobed.
+    """
+    harmonics = min(harmonics, max_harmonics(coeffs))
+    seeds = np.linspace(0.0, 1.0, 4 * harmonics + 1)
+    return adaptive_samples(lambda t: evaluate_fourier(coeffs, t, harmonics, cache=False),
+                            scale, tolerance, seeds)
+
+
+def fit_fourier_points(points, harmonics=POINT_HARMONICS, method='lstsq', chunk=None):
+    """Fit a truncated Fourier series directly to the raw points of a closed stroke.
+
+    Points are parameterized by arc length (including the closing step back
+    to the first point) and weighted by the arc length around each, so the
+    fit approximates the continuous curve however unevenly it was sampled.
+    ``method='lstsq'`` solves the weighted least-squares normal equations;
+    ``'nudft'`` takes the non-uniform DFT, i.e. the quadrature of the
+    Fourier integrals, which needs no solve and costs O(N * harmonics)
+    instead of O(N * harmonics^2). Either way the basis is built ``chunk``
+    points at a time, so memory stays bounded for million-point strokes.
+
+    Returns a spectrum dict like :func:`compute_fourier`'s (``x_fft``,
+    ``y_fft``, ``n``, ``alias_error``) holding exactly ``harmonics`` terms,
+    plus the weighted RMS ``residual`` of the fit and the ``method``. The
+    least-squares residual is exact; the NUDFT one is estimated from
+    Parseval's relation.
+    """
+    if method not in ('lstsq', 'nudft'):
+        raise ValueError(f"Unknown point spectrum method: {method!r}")
+    points = np.asarray(points, dtype=float)
+    steps = np.hypot(*np.diff(points, axis=0, append=points[:1]).T)
+    total = steps.sum()
+    if total == 0:
+        raise ValueError("Cannot fit a spectrum to a stroke of coincident points")
+    t = np.concatenate([[0], np.cumsum(steps[:-1])]) / total
+    weights = (steps + np.roll(steps, 1)) / (2 * total)
+
+    harmonics = max(0, min(harmonics, (len(points) - 1) // 2))
+    columns = 2 * harmonics + 1
+    rows = chunk or max(1, BASIS_MAX_ELEMENTS // (4 * columns))
+    chunks = [slice(start, start + rows) for start in range(0, len(points), rows)]
+
+    # Accumulate B'WB and B'Wp over chunks, with sqrt(W) folded into both sides
+    rhs = np.zeros((columns, 2))
+    normal = np.zeros((columns, columns)) if method == 'lstsq' else None
+    energy = np.sum(weights * np.sum(points**2, axis=1))
+    for part in chunks:
+        root = np.sqrt(weights[part])
+        basis = fourier_basis(t[part], harmonics, cache=False)
+        basis *= root[:, None]
+        rhs += basis.T @ (points[part] * root[:, None])
+        if normal is not None:
+            normal += basis.T @ basis
+
+    if normal is not None:
+        ridge = 1e-12 * np.trace(normal) / columns  # keeps sparse strokes solvable
+        coefficients = np.linalg.solve(normal + ridge * np.eye(columns), rhs)
+        residual = energy - 2 * np.sum(coefficients * rhs) + np.sum(coefficients * (normal @ coefficients))
+    else:
+        scale = np.full(columns, 2.0)
+        scale[0] = 1.0
+        coefficients = rhs * scale[:, None]
+        residual = energy - np.sum(coefficients**2 / scale[:, None])
+
+    # Express the series as the rfft of n samples so the spectrum helpers apply
+    n = 2 * harmonics + 2
+    spectrum = np.empty((harmonics + 1, 2), dtype=complex)
+    spectrum[0] = n * coefficients[0]
+    spectrum[1:] = n / 2 * (coefficients[1::2] - 1j * coefficients[2::2])
+    return {
+        'x_fft': spectrum[:, 0].copy(),
+        'y_fft': spectrum[:, 1].copy(),
+        'n': n,
+        'alias_error': 0.0,
+        'residual': float(np.sqrt(max(residual, 0.0))),
+        'method': method,
+    }
+
+
+def with_point_spectrum(fit, points, method='lstsq', harmonics=None):
+    """Copy of a closed CurveFit whose spectrum is fitted to the raw ``points``
+    (see :func:`fit_fourier_points`); open fits are returned unchanged"""
+    if not fit.is_closed or method == 'spline':
+        return fit
+    fourier = fit_fourier_points(points, max(harmonics or 0, POINT_HARMONICS), method)
+    return CurveFit(fit.t, fit.x, fit.y, fit.x_spline, fit.y_spline, True, fourier)
+
+
+def get_spline_polynomial(spline, segment_idx):
+    """Coefficients of (t - t_i)^3, ^2, ^1, ^0 for one spline segment"""
+    return spline.c[:, segment_idx]
+
+
+def fit_curve(points, x_range=DEFAULT_RANGE, y_range=DEFAULT_RANGE, harmonics=None,
+              simplify='rdp', spectrum='spline'):
+    """Fit a stroke given as an (N, 2) sequence of x, y points.
+
+    Runs the same pipeline as the GUI: smoothing, closed-curve detection,
+    arc-length parameterization, cubic splines and, for closed
+    curves, the Fourier spectrum. ``simplify`` selects how control points
+    are picked (see :func:`smooth_points`); the tolerance scales with the
+    axis ranges. The spectrum's sample count adapts to the curve (see
+    :func:`compute_fourier`) and is at least enough to resolve ``harmonics``.
+    ``spectrum='lstsq'`` or ``'nudft'`` fits the spectrum to the raw points
+    instead of resampling the spline (see :func:`fit_fourier_points`).
+    Raises ValueError for degenerate strokes.
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"Expected an (N, 2) array of points, got shape {points.shape}")
+    if len(points) < 2:
+        raise ValueError("Need at least two points to fit a curve")
+    if not np.isfinite(points).all():
+        raise ValueError("Stroke contains non-finite points")
+
+    if spectrum not in SPECTRUM_METHODS:
+        raise ValueError(f"Unknown spectrum method: {spectrum!r}")
+
+    smoothed = smooth_points(points, simplify, SIMPLIFY_TOLERANCE * min(x_range, y_range))
+    fit = fit_control_points(smoothed, x_range, y_range, harmonics, spectrum=spectrum == 'spline')
+    if spectrum != 'spline' and fit.is_closed:
+        with stage('fft'):
+            fit = with_point_spectrum(fit, points, spectrum, harmonics)
+    return fit
+
+
+def fit_control_points(control, x_range=DEFAULT_RANGE, y_range=DEFAULT_RANGE, harmonics=None,
+                       arc_length=None, spectrum=True):
+    """Fit splines (and, for closed curves, the spectrum) through control points.
+
+    Closed curves are made exactly periodic, by snapping the last point onto
+    the first or, if the gap is wider than the simplification tolerance,
+    adding a closing point, and are fitted with periodic splines. The curve
+    and its first two derivatives then wrap around continuously, so the
+    spectrum has no endpoint step and converges quickly. Open curves use
+    natural splines. ``arc_length`` may give the cumulative arc length at
+    each control point when the caller already tracks it. ``spectrum=False``
+    leaves ``fourier`` empty for a caller that fits it another way.
+    """
+    control = np.asarray(control, dtype=float)
+    is_closed = is_closed_stroke(control, x_range, y_range)
+    periodic = is_closed and len(control) > 2
+
+    with stage('parameterize'):
+        if arc_length is None:
+            steps = np.hypot(*np.diff(control, axis=0).T)
+            arc_length = np.concatenate([[0], np.cumsum(steps)])
+        if periodic:
+            gap = np.hypot(*(control[-1] - control[0]))
+            if gap > SIMPLIFY_TOLERANCE * min(x_range, y_range):
+                control = np.concatenate([control, control[:1]])
+                arc_length = np.append(arc_length, arc_length[-1] + gap)
+            else:
+                control = np.concatenate([control[:-1], control[:1]])
+                arc_length = np.append(arc_length[:-1],
+                                       arc_length[-2] + np.hypot(*(control[-1] - control[-2])))
+        total = arc_length[-1]
+        t = arc_length / total if total > 0 else np.linspace(0, 1, len(control))
+
+    with stage('spline'):
+        from scipy.interpolate import CubicSpline
+        x, y = control[:, 0], control[:, 1]
+        bc_type = 'periodic' if periodic else 'natural'
+        x_spline = CubicSpline(t, x, bc_type=bc_type)
+        y_spline = CubicSpline(t, y, bc_type=bc_type)
+
+    fourier = None
+    if is_closed and spectrum:
+        with stage('fft'):
+            fourier = compute_fourier(x_spline, y_spline, harmonics=harmonics or 0)
+    return CurveFit(t, x, y, x_spline, y_spline, is_closed, fourier)
+
+
+def fit_curves(strokes, x_range=DEFAULT_RANGE, y_range=DEFAULT_RANGE, harmonics=None,
+               simplify='rdp', spectrum='spline'):
+    """Fit every stroke in ``strokes`` and return the list of CurveFit results"""
+    return [fit_curve(points, x_range, y_range, harmonics, simplify, spectrum) for points in strokes]
+
+
+class StreamingFitter:
+    """Incremental version of :func:`fit_curve` for strokes that arrive point by point.
+
+    Work is done as points are appended rather than when the stroke ends:
+
+    * Savitzky-Golay smoothing is applied every ``STREAM_STEP`` points to
+      those whose centred window is complete, using the same coefficients as
+      ``savgol_filter``; only the last ``SMOOTH_WINDOW // 2`` points stay
+      provisional, and those are evaluated with the same edge fit at
+      :meth:`fit` time, so the smoothed stroke matches the batch result.
+    * Every ``STREAM_BLOCK`` smoothed points, the pending stretch is
+      simplified and the control points up to its last interior keeper are
+      committed, along with their running arc length.
+
+    :meth:`fit` then only has to finish the tail and solve the splines, so
+    it costs about the same however long the stroke is. Committing in blocks
+    can keep a few more control points than simplifying the whole stroke at
+    once, but every point stays within the same tolerance. The ``'stride'``
+    method needs the final length, so it only streams the smoothing.
+    """
+
+    def __init__(self, x_range=DEFAULT_RANGE, y_range=DEFAULT_RANGE, simplify='rdp',
+                 points=None):
+        if simplify not in SIMPLIFY_METHODS:
+            raise ValueError(f"Unknown simplification method: {simplify!r}")
+        self.x_range = x_range
+        self.y_range = y_range
+        self.simplify = simplify
+        self.tolerance = SIMPLIFY_TOLERANCE * min(x_range, y_range)
+        # Raw points go into ``points`` if given, so a caller can share its buffer
+        self.points = points if points is not None else StrokeBuffer()
+        self.points.clear()
+        from scipy.signal import savgol_coeffs
+        self._coeffs = savgol_coeffs(SMOOTH_WINDOW, SMOOTH_POLYORDER, use='dot')
+        self._smoothed = StrokeBuffer()
+        self._control = StrokeBuffer()
+        self._arc_length = [0.0]
+        self._anchor = 0
+        self._next_pass = STREAM_BLOCK
+
+    def __len__(self):
+        return len(self.points)
+
+    def append(self, x, y):
+        self.points.append(x, y)
+        self._advance()
+
+    def extend(self, points):
+        self.points.extend(points)
+        self._advance()
+
+    def feed(self, source, every=STREAM_BLOCK):
+        """Consume an iterable of points (or of point chunks), yielding partial fits.
+
+        Intended for live feeds such as a digitizer generator: a partial
+        CurveFit is yielded after every ``every`` new points, and the final
+        fit once ``source`` is exhausted.
+        """
+        due = len(self) + every
+        for item in source:
+            self.extend(item)
+            if len(self) >= due and len(self) >= 2:
+                due = len(self) + every
+                yield self.fit()
+        yield self.fit()
+
+    def _advance(self, force=False):
+        raw = self.points.points
+        n, half = len(raw), SMOOTH_WINDOW // 2
+        done = len(self._smoothed)
+        if n < SMOOTH_WINDOW or not force and n - half - done < STREAM_STEP:
+            return
+        with stage('smooth'):
+            if done == 0:
+                # The leading points use savgol_filter's polynomial edge fit
+                from scipy.signal import savgol_filter
+                head = savgol_filter(raw[:SMOOTH_WINDOW], SMOOTH_WINDOW, SMOOTH_POLYORDER, axis=0)
+                self._smoothed.extend(head[:half])
+                self._control.append(*head[0])
+                done = half
+            if n - half > done:
+                windows = sliding_window_view(raw[done - half:n], SMOOTH_WINDOW, axis=0)
+                self._smoothed.extend(windows @ self._coeffs)
+
+        if self.simplify != 'stride' and len(self._smoothed) >= self._next_pass:
+            self._next_pass = len(self._smoothed) + STREAM_BLOCK
+            settled = self._simplify(self._smoothed[self._anchor:], final=False)
+            if settled is not None:
+                control, arc_length, last = settled
+                self._control.extend(control)
+                self._arc_length.extend(arc_length.tolist())
+                self._anchor += last
+
+    def _simplify(self, pending, final):
+        """Simplify the smoothed points after the last committed control point.
+
+        Returns the new control points (excluding the anchor at
+        ``pending[0]``), their cumulative arc lengths and the index in
+        ``pending`` they run to, or None if nothing is settled yet. Unless
+        ``final``, the stretch after the last interior keeper stays pending,
+        since later points can still change how it is simplified.
+        """
+        with stage('simplify'):
+            keep = SIMPLIFIERS[self.simplify](pending, self.tolerance)
+        if not final:
+            if len(keep) > 2:
+                keep = keep[:-1]
+            elif len(pending) <= 4 * STREAM_BLOCK:
+                return None
+        control = pending[keep]
+        steps = np.hypot(*np.diff(control, axis=0).T)
+        return control[1:], self._arc_length[-1] + np.cumsum(steps), keep[-1]
+
+    def _smoothed_tail(self):
+        from scipy.signal import savgol_filter
+        tail = savgol_filter(self.points[-SMOOTH_WINDOW:], SMOOTH_WINDOW, SMOOTH_POLYORDER, axis=0)
+        return tail[SMOOTH_WINDOW // 2 + 1:]
+
+    def fit(self, harmonics=None, spectrum='spline'):
+        """Fit the stroke received so far; safe to call repeatedly.
+
+        ``spectrum`` is as for :func:`fit_curve`.
+        """
+        raw = self.points.points
+        if len(raw) < SMOOTH_WINDOW:
+            return fit_curve(raw, self.x_range, self.y_range, harmonics, self.simplify, spectrum)
+        self._advance(force=True)
+
+        if self.simplify == 'stride':
+            smoothed = np.concatenate([self._smoothed.points, self._smoothed_tail()])
+            control = smoothed[::max(1, len(smoothed) // CONTROL_POINTS)]
+            arc_length = None
+        else:
+            pending = np.concatenate([self._smoothed[self._anchor:], self._smoothed_tail()])
+            control, arc_length, _ = self._simplify(pending, final=True)
+            control = np.concatenate([self._control.points, control])
+            arc_length = np.concatenate([self._arc_length, arc_length])
+        fit = fit_control_points(control, self.x_range, self.y_range, harmonics, arc_length,
+                                 spectrum=spectrum == 'spline')
+        if spectrum != 'spline' and fit.is_closed:
+            with stage('fft'):
+                fit = with_point_spectrum(fit, raw, spectrum, harmonics)
+        return fit
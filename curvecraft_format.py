@@ -0,0 +1,202 @@
+"""Text formatting of fitted curves for the equations panel.
+
+Functions here return the panel contents as a list of ``(text, tag)`` chunks,
+where ``tag`` names one of the text styles configured by the GUI, or as an
+EquationDocument that formats its repeated sections on demand and joins
+chunks into one string plus tag ranges, so the GUI can fill the Text widget
+with a single insert. Nothing here touches Tk, so it can run on a worker
+thread or headless.
+"""
+from bisect import bisect_right
+
+from curvecraft_engine import fourier_coefficients, get_spline_polynomial, truncation_errors
+
+PAGE_SECTIONS = 200  # segments rendered at a time in the equations panel
+
+FOURIER_EXPLANATION = """Fourier Series Form:
+x(t) = a₀/2 + Σ[aₖ·cos(2πkt) + bₖ·sin(2πkt)]
+y(t) = c₀/2 + Σ[cₖ·cos(2πkt) + dₖ·sin(2πkt)]
+
+Where:
+• aₖ, bₖ: Cosine and sine coefficients for x(t)
+• cₖ, dₖ: Cosine and sine coefficients for y(t)
+• k: Harmonic number (frequency = k cycles per unit)
+• t: Parameter from 0 to 1 (one complete cycle)"""
+
+
+def _cubic_terms(coeffs, dt_str):
+    terms = []
+    if abs(coeffs[0]) > 1e-10:
+        terms.append(f"{coeffs[0]:.6f}·{dt_str}³")
+    if abs(coeffs[1]) > 1e-10:
+        terms.append(f"{coeffs[1]:+.6f}·{dt_str}²")
+    if abs(coeffs[2]) > 1e-10:
+        terms.append(f"{coeffs[2]:+.6f}·{dt_str}")
+    if abs(coeffs[3]) > 1e-10 or len(terms) == 0:
+        terms.append(f"{coeffs[3]:+.6f}")
+    return " ".join(terms)
+
+
+def _fourier_terms(cos_coeffs, sin_coeffs):
+    parts = [f"{cos_coeffs[0]:.6f}"]
+    for k in range(1, len(cos_coeffs)):
+        cn, sn = cos_coeffs[k], sin_coeffs[k]
+        if abs(cn) > 1e-6:
+            sign = "+ " if cn >= 0 else "- "
+            parts.append(f"{sign}{abs(cn):.6f}·cos({k}·2πt)")
+        if abs(sn) > 1e-6:
+            sign = "+ " if sn >= 0 else "- "
+            parts.append(f"{sign}{abs(sn):.6f}·sin({k}·2πt)")
+    return " ".join(parts).replace("+ -", "- ").replace("- -", "+ ")
+
+
+def assemble(chunks):
+    """Join chunks into one string and the ``(start, end)`` offsets of each tag"""
+    parts = []
+    ranges = {}
+    offset = 0
+    for text, tag in chunks:
+        parts.append(text)
+        end = offset + len(text)
+        tag_ranges = ranges.setdefault(tag, [])
+        if tag_ranges and tag_ranges[-1][1] == offset:
+            tag_ranges[-1] = (tag_ranges[-1][0], end)
+        else:
+            tag_ranges.append((offset, end))
+        offset = end
+    return "".join(parts), ranges
+
+
+def text_indices(text, ranges, line=1, column=0):
+    """Convert the offsets from :func:`assemble` into Tk ``line.column`` indices.
+
+    ``line`` and ``column`` give the index the text is inserted at. Returns
+    ``{tag: [start, end, start, end, ...]}``, ready for one ``tag_add`` call
+    per tag.
+    """
+    newlines = [i for i, char in enumerate(text) if char == '\n']
+
+    def index(offset):
+        before = bisect_right(newlines, offset - 1)
+        if before == 0:
+            return f"{line}.{column + offset}"
+        return f"{line + before}.{offset - newlines[before - 1] - 1}"
+
+    return {tag: [index(offset) for span in spans for offset in span]
+            for tag, spans in ranges.items()}
+
+
+class EquationDocument:
+    """Panel text as a header, a run of repeated sections and a footer.
+
+    Sections are formatted on demand by ``section(i)``, so a curve with
+    thousands of segments only pays for the ones actually shown. Documents
+    are immutable once built, which makes them safe to cache and to build on
+    a worker thread.
+    """
+
+    def __init__(self, head, tail=(), count=0, section=None):
+        self.head = list(head)
+        self.tail = list(tail)
+        self.count = count
+        self._section = section
+
+    def sections(self, start, stop):
+        """Chunks of sections ``start`` up to (not including) ``stop``"""
+        chunks = []
+        for i in range(start, min(stop, self.count)):
+            chunks += self._section(i)
+        return chunks
+
+    def chunks(self):
+        """Every chunk of the document"""
+        return self.head + self.sections(0, self.count) + self.tail
+
+    @property
+    def nbytes(self):
+        """Size of the stored header and footer text; sections aren't kept"""
+        return sum(len(text) for text, _ in self.head + self.tail)
+
+    def text(self):
+        """The whole document as plain text"""
+        return "".join(text for text, _ in self.chunks())
+
+
+def parametric_document(t, x_spline, y_spline, is_closed):
+    """Document describing every piecewise cubic segment of a spline curve"""
+    n_segments = len(t) - 1
+    head = [
+        ("PARAMETRIC EQUATIONS\n\n", 'title'),
+        (f"Curve defined by {n_segments} piecewise cubic polynomial segments:\n\n", 'info'),
+        ("GENERAL FORM\n", 'header'),
+        ("-" * 80 + "\n\n", 'info'),
+    ]
+
+    def segment(seg_idx):
+        t0 = t[seg_idx]
+        t1 = t[seg_idx + 1]
+        dt_str = f"(t - {t0:.4f})"
+        return [
+            (f"Segment {seg_idx + 1}: ", 'header'),
+            (f"t ∈ [{t0:.4f}, {t1:.4f}]\n", 'segment'),
+            ("  x(t) = ", 'equation'),
+            (_cubic_terms(get_spline_polynomial(x_spline, seg_idx), dt_str) + "\n", 'coefficient'),
+            ("  y(t) = ", 'equation'),
+            (_cubic_terms(get_spline_polynomial(y_spline, seg_idx), dt_str) + "\n\n", 'coefficient'),
+        ]
+
+    tail = [
+        ("=" * 80 + "\n\n", 'info'),
+        ("Summary\n", 'header'),
+        (f"  • Total segments: {n_segments}\n", 'info'),
+        ("  • Parameter range: t ∈ [0, 1]\n", 'info'),
+        (f"  • Curve type: {'Closed loop' if is_closed else 'Open path'}\n", 'info'),
+    ]
+    if is_closed:
+        tail.append(("\nTip: ", 'highlight'))
+        tail.append(("Switch to Fourier mode for a continuous expression with detailed coefficients table!\n", 'info'))
+    return EquationDocument(head, tail, n_segments, segment)
+
+
+def parametric_equations(t, x_spline, y_spline, is_closed):
+    """Chunks describing every piecewise cubic segment of a spline curve"""
+    return parametric_document(t, x_spline, y_spline, is_closed).chunks()
+
+
+def fourier_document(fourier, harmonics):
+    """Document for the truncated Fourier series of a closed curve"""
+    return EquationDocument(fourier_equations(fourier, harmonics))
+
+
+def fourier_equations(fourier, harmonics):
+    """Chunks for the truncated Fourier series of a closed curve"""
+    a, b, c, d = fourier_coefficients(fourier, harmonics)
+
+    chunks = [
+        ("FOURIER SERIES APPROXIMATION\n\n", 'title'),
+        (f"Using {harmonics} harmonics for approximation:\n\n", 'info'),
+        ("x(t) = ", 'equation'),
+        (_fourier_terms(a, b) + "\n\n", 'coefficient'),
+        ("y(t) = ", 'equation'),
+        (_fourier_terms(c, d) + "\n\n", 'coefficient'),
+        ("\n" + "=" * 80 + "\n\n", 'info'),
+        ("Explanation:\n", 'header'),
+        (FOURIER_EXPLANATION + "\n\n", 'info'),
+        ("Approximation Quality: ", 'highlight'),
+    ]
+
+    # Judge the fit by its actual error relative to the curve's spread
+    # (the error with no harmonics at all), not by the harmonic count
+    rms, max_bound = truncation_errors(fourier)
+    harmonics = min(harmonics, len(a) - 1)
+    relative = rms[harmonics] / rms[0] if rms[0] > 0 else 0.0
+    if relative > 0.05:
+        quality = "Low (increase harmonics for better fit)"
+    elif relative > 0.01:
+        quality = "Medium (good balance of accuracy and simplicity)"
+    else:
+        quality = "High (excellent fit, more complex equation)"
+    chunks.append((f"{quality}\n", 'info'))
+    chunks.append((f"  • RMS error: {rms[harmonics]:.6f} ({relative:.2%} of curve size)\n", 'info'))
+    chunks.append((f"  • Max deviation: ≤ {max_bound[harmonics]:.6f}\n", 'info'))
+    return chunks
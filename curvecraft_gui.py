@@ -0,0 +1,1497 @@
+"""The CurveCraft Tk application.
+
+Matplotlib is only imported once the window is on screen (see
+CurveAnalyzer.setup_figure), and SciPy is preloaded in the background after
+that, so the window appears without waiting for either.
+"""
+import threading
+import time
+import traceback
+import numpy as np
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from curvecraft_engine import (MAX_HARMONICS, SIMPLIFY_METHODS, SPECTRUM_METHODS,
+                               StreamingFitter, StrokeBuffer, fit_curve, preload,
+                               fourier_coefficients, fourier_plot_samples, max_harmonics,
+                               select_harmonics, truncation_errors)
+from curvecraft_format import (PAGE_SECTIONS, assemble, fourier_document, parametric_document,
+                               text_indices)
+from curvecraft_cache import LRUCache, stroke_digest
+from curvecraft_profile import profiler, stage, timed
+from curvecraft_scene import PolylineLOD, Scene, level_scale, zoom_level
+from curvecraft_store import STORE_EXTENSION, CurveWriter
+
+TIMING_STAGES = ('smooth', 'simplify', 'parameterize', 'spline', 'fft', 'evaluate', 'format', 'cull',
+                 'hit_test', 'text', 'table', 'setup_canvas', 'render_curve', 'navigate', 'draw', 'blit')
+TIMING_POLL_MS = 500
+HIT_TOLERANCE = 0.02  # fraction of the smaller axis range
+ARTIFACT_CACHE_BYTES = 64 * 1024 * 1024
+ZOOM_FACTOR = 1.25  # view scale change per mouse wheel step
+LOD_BUDGET = 0.03  # seconds of curve sampling per frame; the rest is finished when idle
+MAX_GRID_LINES = 50  # integer grid lines per axis, skipped when zoomed further out
+
+class CoefficientTable:
+    """Virtualized Fourier coefficients table.
+    
+    Only a fixed pool of Treeview rows exists; scrolling rebinds them to a
+    different window of harmonics and updates their text in place. Changing
+    the number of harmonics therefore costs O(visible rows), not O(harmonics).
+    """
+    
+    COLUMNS = ('k', 'a', 'b', 'c', 'd', 'rms')
+    HEADERS = ["k", "aₖ (x cos)", "bₖ (x sin)", "cₖ (y cos)", "dₖ (y sin)", "RMS error"]
+    
+    def __init__(self, parent, rows=12):
+        style = ttk.Style(parent)
+        style.configure('Coefficients.Treeview', font=('Consolas', 10), rowheight=24,
+                        background='#ffffff', fieldbackground='#ffffff', foreground='#333333')
+        style.configure('Coefficients.Treeview.Heading', font=('Helvetica', 11, 'bold'),
+                        background='#fff8e1', foreground='#b8860b')
+        
+        self.tree = ttk.Treeview(parent, columns=self.COLUMNS, show='headings', height=rows,
+                                 selectmode='none', style='Coefficients.Treeview')
+        for col, header in zip(self.COLUMNS, self.HEADERS):
+            self.tree.heading(col, text=header)
+            self.tree.column(col, anchor='center', width=60 if col == 'k' else 120, stretch=col != 'k')
+        self.tree.tag_configure('odd', background='#fff8e1')
+        
+        self.scrollbar = ttk.Scrollbar(parent, orient='vertical', command=self.on_scroll)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+        
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self.on_wheel)
+        
+        self.rows = [self.tree.insert('', tk.END, values=self.blank()) for _ in range(rows)]
+        self.coefficients = None
+        self.count = 0
+        self.offset = 0
+    
+    def blank(self):
+        return ('',) * len(self.COLUMNS)
+    
+    def set_coefficients(self, a, b, c, d, errors):
+        """Show coefficients for k = 0..len(a)-1, keeping the scroll position.
+        
+        ``errors[k]`` is the RMS reconstruction error when truncating at k.
+        """
+        self.coefficients = (a, b, c, d, errors)
+        self.count = len(a)
+        self.scroll_to(self.offset)
+    
+    def clear(self):
+        self.coefficients = None
+        self.count = 0
+        self.scroll_to(0)
+    
+    @timed('table')
+    def scroll_to(self, offset):
+        self.offset = max(0, min(int(offset), self.count - len(self.rows)))
+        for i, row in enumerate(self.rows):
+            k = self.offset + i
+            if k < self.count:
+                values = [f"{k}"] + [f"{coeffs[k]:.8f}" for coeffs in self.coefficients]
+                self.tree.item(row, values=values, tags=('odd',) if k % 2 else ())
+            else:
+                self.tree.item(row, values=self.blank(), tags=())
+        if self.count > len(self.rows):
+            self.scrollbar.set(self.offset / self.count, (self.offset + len(self.rows)) / self.count)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(round(float(amount) * self.count))
+        elif action == 'scroll':
+            step = len(self.rows) if unit == 'pages' else 1
+            self.scroll_to(self.offset + int(amount) * step)
+    
+    def on_wheel(self, event):
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return 'break'
+
+
+class EquationView:
+    """Text widget showing one EquationDocument, rendered a page at a time.
+    
+    Each page is inserted as a single string with its tags applied in one
+    tag_add call per tag. Only the first PAGE_SECTIONS sections are rendered
+    up front; the next page is appended when the view is scrolled near the
+    end of what is rendered.
+    """
+    
+    TAGS = {
+        'title': dict(foreground='#b8860b', font=('Helvetica', 20, 'bold')),
+        'header': dict(foreground='#d4a017', font=('Helvetica', 14, 'bold')),
+        'equation': dict(foreground='#1e88e5', font=('Consolas', 12, 'bold')),
+        'coefficient': dict(foreground='#e53935', font=('Consolas', 11)),
+        'info': dict(foreground='#666666', font=('Helvetica', 11)),
+        'highlight': dict(foreground='#ff6b00', font=('Helvetica', 11, 'bold')),
+        'segment': dict(foreground='#43a047', font=('Consolas', 10)),
+    }
+    LOAD_AHEAD = 0.9  # render the next page once the view reaches this fraction
+    
+    def __init__(self, parent, scrollbar, **options):
+        self.scrollbar = scrollbar
+        self.text = tk.Text(parent, yscrollcommand=self.on_scroll, **options)
+        for tag, style in self.TAGS.items():
+            self.text.tag_configure(tag, **style)
+        self.document = None
+        self.shown = 0
+        self.loading = False
+    
+    def insert(self, index, chunks):
+        """Insert chunks at ``index`` in one call, then tag them in bulk"""
+        text, ranges = assemble(chunks)
+        line, column = map(int, self.text.index(index).split('.'))
+        self.text.insert(index, text, ())
+        for tag, indices in text_indices(text, ranges, line, column).items():
+            if indices:
+                self.text.tag_add(tag, *indices)
+    
+    def show(self, document):
+        """Render ``document`` unless it is already the one shown"""
+        if document is self.document:
+            return
+        self.document = document
+        self.shown = min(PAGE_SECTIONS, document.count)
+        self.text.config(state='normal')
+        self.text.delete('1.0', tk.END)
+        self.insert('1.0', document.head + document.sections(0, self.shown))
+        # Later pages go before the footer, at this mark. It keeps left gravity
+        # so it stays in front of the footer, except while a page is appended
+        self.text.mark_set('sections_end', 'end-1c')
+        self.text.mark_gravity('sections_end', tk.LEFT)
+        self.insert('end-1c', document.tail)
+        self.text.config(state='disabled')
+        self.text.see('1.0')
+    
+    def show_more(self):
+        self.loading = False
+        document = self.document
+        if document is None or self.shown >= document.count:
+            return
+        stop = min(self.shown + PAGE_SECTIONS, document.count)
+        self.text.config(state='normal')
+        self.text.mark_gravity('sections_end', tk.RIGHT)
+        self.insert('sections_end', document.sections(self.shown, stop))
+        self.text.mark_gravity('sections_end', tk.LEFT)
+        self.text.config(state='disabled')
+        self.shown = stop
+    
+    def clear(self):
+        self.document = None
+        self.shown = 0
+        self.text.config(state='normal')
+        self.text.delete('1.0', tk.END)
+    
+    def full_text(self):
+        if self.document is not None:
+            return self.document.text()
+        return self.text.get('1.0', tk.END)
+    
+    def on_scroll(self, first, last):
+        if self.text.winfo_ismapped():
+            self.scrollbar.set(first, last)
+        if (float(last) >= self.LOAD_AHEAD and not self.loading and self.document is not None
+                and self.shown < self.document.count):
+            self.loading = True
+            self.text.after_idle(self.show_more)
+
+
+class UpdateScheduler:
+    """Runs an expensive computation off the Tk thread, keeping only the newest request.
+    
+    submit() replaces any request the worker hasn't started yet, so bursts of
+    events (e.g. dragging a slider) coalesce instead of queueing. The worker
+    keeps a finished result only if no newer request was submitted while it
+    ran, and a root.after poll on the Tk thread passes it to ``apply``; stale
+    results are dropped, and ones the poll didn't pick up in time are
+    overwritten, never queued.
+    """
+    
+    def __init__(self, root, compute, apply, poll_ms=16):
+        self.root = root
+        self.compute = compute
+        self.apply = apply
+        self.poll_ms = poll_ms
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending = None
+        self._result = None
+        self._done = 0
+        self._polling = False
+        threading.Thread(target=self._work, daemon=True).start()
+    
+    def submit(self, *args):
+        with self._cond:
+            self._generation += 1
+            self._pending = (self._generation, args)
+            self._cond.notify()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+    
+    @property
+    def busy(self):
+        """Whether a submitted request hasn't been applied yet"""
+        return self._polling
+    
+    def _work(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                generation, args = self._pending
+                self._pending = None
+            try:
+                result = self.compute(*args)
+            except Exception:
+                traceback.print_exc()
+                result = None
+            with self._cond:
+                self._done = generation
+                if result is not None and generation == self._generation:
+                    self._result = result
+    
+    def _poll(self):
+        with self._cond:
+            result, self._result = self._result, None
+            finished = self._done == self._generation
+        if result is not None:
+            self.apply(result)
+        if finished:
+            self._polling = False
+        else:
+            self.root.after(self.poll_ms, self._poll)
+
+
+class CurveAnalyzer:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("CurveCraft - Parametric Expression Analyzer")
+        self.root.configure(bg='#fffdf0')
+        self.root.geometry("1400x900")
+        
+        # State
+        self.raw_points = StrokeBuffer()
+        self.stroke_fitter = None
+        self.drawing = False
+        self.curve_fit = None
+        self.parametric_curve = None
+        self.fourier_curve = None
+        self.is_closed = False
+        self.harmonics = 15
+        self.show_mode = 'parametric'
+        self.x_range = 1.2  # Default x range
+        self.y_range = 1.2  # Default y range
+        # Visible (xmin, xmax, ymin, ymax) after zooming or panning; None is ±range
+        self.view = None
+        self.pan_start = None
+        self.navigation_pending = False
+        
+        # Rendering cache: static grid layer per (x_range, y_range), the view
+        # its limits and ticks were set for, its pixels, and the curve
+        # artists drawn on top of it
+        self.canvas_key = None
+        self.view_key = None
+        self.grid_lines = []
+        self.tick_decimals = 1
+        self.background = None
+        self.curve_artists = []
+        
+        # Fits, samples, equations and table rows, keyed on
+        # (kind, curve_key, *params) with curve_key identifying the stroke
+        # content and fit settings (see process_stroke)
+        self.curve_key = None
+        self.artifacts = LRUCache(ARTIFACT_CACHE_BYTES)
+        
+        # Every fitted curve on the canvas; the active one is shown in the
+        # equations panel, the others are drawn faintly and can be selected
+        self.scene = Scene()
+        self.active_curve = None
+        self.curve_lod = None
+        self.hover_curve = None
+        self.hover_line = None
+        self.others_collection = None
+        self.refine_pending = False
+        
+        self.fig = None
+        with stage('startup:window'):
+            self.setup_ui()
+            self.root.update()
+        self.setup_figure()
+        threading.Thread(target=self.preload_scipy, daemon=True).start()
+        
+    def setup_figure(self):
+        """Import matplotlib and build the figure into the placeholder frame"""
+        with stage('startup:import matplotlib'):
+            import matplotlib.pyplot as plt
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        with stage('startup:figure'):
+            self.fig, self.ax = plt.subplots(figsize=(5, 5), facecolor='#ffffff')
+            self.setup_canvas()
+            
+            self.canvas_placeholder.destroy()
+            self.canvas = FigureCanvasTkAgg(self.fig, self.canvas_frame)
+            # Full figure draws (draw_idle ends up here) are the 'draw' stage
+            self.canvas.draw = timed('draw')(self.canvas.draw)
+            self.canvas.get_tk_widget().configure(bg='#ffffff', highlightthickness=0)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            
+            self.canvas.mpl_connect('button_press_event', self.on_press)
+            self.canvas.mpl_connect('motion_notify_event', self.on_motion)
+            self.canvas.mpl_connect('button_release_event', self.on_release)
+            self.canvas.mpl_connect('button_press_event', self.on_double_click)
+            self.canvas.mpl_connect('scroll_event', self.on_scroll)
+            self.canvas.mpl_connect('draw_event', self.on_draw)
+        
+        with stage('startup:first draw'):
+            self.canvas.draw()
+    
+    def preload_scipy(self):
+        # Runs on a daemon thread; the first stroke waits only if it isn't done
+        with stage('startup:import scipy'):
+            preload()
+    
+    def setup_ui(self):
+        # Header
+        header = tk.Frame(self.root, bg='#ffd700', height=100)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+        
+        title_frame = tk.Frame(header, bg='#ffd700')
+        title_frame.place(relx=0.5, rely=0.5, anchor='center')
+        
+        tk.Label(title_frame, text="CurveCraft", font=('Helvetica', 32, 'bold'), 
+                bg='#ffd700', fg='#333333').pack()
+        
+        tk.Label(title_frame, text="Draw curves and extract mathematical expressions", 
+                font=('Helvetica', 14), bg='#ffd700', fg='#666666').pack(pady=(5, 0))
+        
+        # Main content area
+        content = tk.Frame(self.root, bg='#fffdf0')
+        content.pack(fill=tk.BOTH, expand=True, padx=30, pady=20)
+        
+        # Left side - Drawing canvas
+        left_panel = tk.Frame(content, bg='#ffffff', highlightbackground='#ffd700', 
+                             highlightthickness=3, width=500, relief=tk.RAISED)
+        left_panel.pack(side=tk.LEFT, fill=tk.BOTH, padx=(0, 25))
+        left_panel.pack_propagate(False)
+        
+        canvas_header = tk.Frame(left_panel, bg='#fff8e1', height=70)
+        canvas_header.pack(fill=tk.X)
+        canvas_header.pack_propagate(False)
+        
+        tk.Label(canvas_header, text="Drawing Canvas", font=('Helvetica', 16, 'bold'),
+                bg='#fff8e1', fg='#b8860b').pack(side=tk.LEFT, padx=25, pady=15)
+        
+        btn_frame = tk.Frame(canvas_header, bg='#fff8e1')
+        btn_frame.pack(side=tk.RIGHT, padx=25)
+        
+        reset_btn = tk.Button(btn_frame, text="Clear Canvas", command=self.reset,
+                             bg='#ff6b6b', fg='white', font=('Helvetica', 11, 'bold'),
+                             relief=tk.FLAT, bd=0, padx=25, pady=8, cursor='hand2',
+                             activebackground='#ff5252', activeforeground='white',
+                             width=15)
+        reset_btn.pack()
+        
+        # Drawing instructions
+        instructions = tk.Frame(left_panel, bg='#fffdf0', height=30)
+        instructions.pack(fill=tk.X, pady=(10, 5))
+        tk.Label(instructions, text="Click and drag to draw | Double-click to complete | Right-click a curve to select it", 
+                bg='#fffdf0', fg='#666666', font=('Helvetica', 10, 'italic')).pack()
+        
+        # Custom range controls
+        range_frame = tk.Frame(left_panel, bg='#fffdf0', height=60)
+        range_frame.pack(fill=tk.X, pady=(5, 10))
+        
+        # X-axis range
+        x_range_frame = tk.Frame(range_frame, bg='#fffdf0')
+        x_range_frame.pack(fill=tk.X, padx=25, pady=2)
+        
+        tk.Label(x_range_frame, text="X Range:", bg='#fffdf0', fg='#666666',
+                font=('Helvetica', 10)).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Current x-range display
+        self.x_range_label = tk.Label(x_range_frame, text=f"±{self.x_range:.1f}", 
+                                     bg='#fffdf0', fg='#333333', font=('Helvetica', 10, 'bold'))
+        self.x_range_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # X-range entry
+        self.x_range_entry = tk.Entry(x_range_frame, width=8, font=('Helvetica', 10),
+                                     bd=2, relief=tk.SOLID, justify='center')
+        self.x_range_entry.insert(0, "1.2")
+        self.x_range_entry.pack(side=tk.LEFT, padx=(0, 5))
+        
+        x_set_btn = tk.Button(x_range_frame, text="Set", command=self.set_x_range,
+                             bg='#ffd700', fg='#333333', font=('Helvetica', 9),
+                             width=4, relief=tk.FLAT, cursor='hand2',
+                             activebackground='#ffc800', padx=5, pady=2)
+        x_set_btn.pack(side=tk.LEFT, padx=(0, 20))
+        
+        # Y-axis range
+        y_range_frame = tk.Frame(range_frame, bg='#fffdf0')
+        y_range_frame.pack(fill=tk.X, padx=25, pady=2)
+        
+        tk.Label(y_range_frame, text="Y Range:", bg='#fffdf0', fg='#666666',
+                font=('Helvetica', 10)).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Current y-range display
+        self.y_range_label = tk.Label(y_range_frame, text=f"±{self.y_range:.1f}", 
+                                     bg='#fffdf0', fg='#333333', font=('Helvetica', 10, 'bold'))
+        self.y_range_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Y-range entry
+        self.y_range_entry = tk.Entry(y_range_frame, width=8, font=('Helvetica', 10),
+                                     bd=2, relief=tk.SOLID, justify='center')
+        self.y_range_entry.insert(0, "1.2")
+        self.y_range_entry.pack(side=tk.LEFT, padx=(0, 5))
+        
+        y_set_btn = tk.Button(y_range_frame, text="Set", command=self.set_y_range,
+                             bg='#ffd700', fg='#333333', font=('Helvetica', 9),
+                             width=4, relief=tk.FLAT, cursor='hand2',
+                             activebackground='#ffc800', padx=5, pady=2)
+        y_set_btn.pack(side=tk.LEFT)
+        
+        # Preset ranges
+        preset_frame = tk.Frame(range_frame, bg='#fffdf0')
+        preset_frame.pack(fill=tk.X, padx=25, pady=(5, 0))
+        
+        tk.Label(preset_frame, text="Presets:", bg='#fffdf0', fg='#666666',
+                font=('Helvetica', 9)).pack(side=tk.LEFT, padx=(0, 5))
+        
+        for label, (x_val, y_val) in [("1x1", (1.0, 1.0)), ("2x2", (2.0, 2.0)), 
+                                      ("πxπ", (3.14, 3.14)), ("10x10", (10.0, 10.0))]:
+            btn = tk.Button(preset_frame, text=label, 
+                           command=lambda x=x_val, y=y_val: self.set_both_ranges(x, y),
+                           bg='#e0f7fa', fg='#006064', font=('Helvetica', 9),
+                           width=4, relief=tk.FLAT, cursor='hand2',
+                           activebackground='#b2ebf2', padx=2, pady=1)
+            btn.pack(side=tk.LEFT, padx=2)
+        
+        # Control point selection for new strokes
+        self.simplify_var = tk.StringVar(value='rdp')
+        simplify_box = ttk.Combobox(preset_frame, textvariable=self.simplify_var,
+                                    values=list(SIMPLIFY_METHODS), width=10, state='readonly')
+        simplify_box.pack(side=tk.RIGHT)
+        simplify_box.bind('<<ComboboxSelected>>', lambda e: self.refit_stroke())
+        tk.Label(preset_frame, text="Simplify:", bg='#fffdf0', fg='#666666',
+                font=('Helvetica', 9)).pack(side=tk.RIGHT, padx=(0, 5))
+        
+        # Matplotlib canvas, filled in by setup_figure once the window is shown
+        self.canvas_frame = tk.Frame(left_panel, bg='#ffffff')
+        self.canvas_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
+        self.canvas_placeholder = tk.Label(self.canvas_frame, text="Loading canvas...",
+                                           bg='#ffffff', fg='#999999', font=('Helvetica', 12))
+        self.canvas_placeholder.pack(expand=True)
+        
+        # Per-stage timings, floated over the plot and toggled with F12
+        self.timing_label = tk.Label(self.canvas_frame, bg='#fffdf0', fg='#666666', justify=tk.LEFT,
+                                     font=('Courier', 8), wraplength=420, cursor='hand2')
+        self.timing_label.bind('<Button-1>', lambda e: self.export_trace())
+        self.root.bind('<F12>', lambda e: self.toggle_timings())
+        
+        # Status
+        status_frame = tk.Frame(left_panel, bg='#fff8e1', height=50)
+        status_frame.pack(fill=tk.X)
+        status_frame.pack_propagate(False)
+        
+        self.status_label = tk.Label(status_frame, text="Click and drag to draw your curve", 
+                                     bg='#fff8e1', fg='#d4a017', font=('Helvetica', 12))
+        self.status_label.pack(pady=12)
+        
+        # Right side - Equations display
+        right_panel = tk.Frame(content, bg='#ffffff', highlightbackground='#ffd700',
+                              highlightthickness=3, relief=tk.RAISED)
+        right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        
+        eq_header = tk.Frame(right_panel, bg='#fff8e1')
+        eq_header.pack(fill=tk.X, padx=25, pady=20)
+        
+        tk.Label(eq_header, text="Mathematical Expressions", font=('Helvetica', 18, 'bold'),
+                bg='#fff8e1', fg='#b8860b').pack(side=tk.LEFT)
+        
+        export_btn = tk.Button(eq_header, text="Copy All", command=self.copy_equations,
+                              bg='#ffd700', fg='#333333', font=('Helvetica', 11, 'bold'),
+                              relief=tk.FLAT, bd=0, padx=25, pady=10, cursor='hand2',
+                              activebackground='#ffc800', activeforeground='#333333',
+                              width=12)
+        export_btn.pack(side=tk.RIGHT)
+        
+        save_btn = tk.Button(eq_header, text="Save Curve", command=self.save_curve,
+                            bg='#fff8e1', fg='#b8860b', font=('Helvetica', 11, 'bold'),
+                            relief=tk.FLAT, bd=0, padx=15, pady=10, cursor='hand2',
+                            activebackground='#ffecb3', activeforeground='#b8860b')
+        save_btn.pack(side=tk.RIGHT, padx=(0, 10))
+        
+        # Mode selector
+        mode_frame = tk.Frame(right_panel, bg='#ffffff')
+        mode_frame.pack(fill=tk.X, padx=25, pady=(0, 15))
+        
+        tk.Label(mode_frame, text="Display Mode:", bg='#ffffff', fg='#666666',
+                font=('Helvetica', 11, 'bold')).pack(side=tk.LEFT, padx=(0, 15))
+        
+        self.mode_var = tk.StringVar(value='parametric')
+        
+        param_radio = tk.Radiobutton(mode_frame, text="Parametric (Piecewise)", 
+                                     variable=self.mode_var, value='parametric',
+                                     command=self.change_mode, bg='#ffffff', fg='#333333',
+                                     selectcolor='#ffffff', font=('Helvetica', 11, 'bold'),
+                                     activebackground='#ffffff', activeforeground='#333333')
+        param_radio.pack(side=tk.LEFT, padx=(0, 25))
+        
+        self.fourier_radio = tk.Radiobutton(mode_frame, text="Fourier Series", 
+                                            variable=self.mode_var, value='fourier',
+                                            command=self.change_mode, bg='#ffffff', fg='#666666',
+                                            selectcolor='#ffffff', font=('Helvetica', 11),
+                                            activebackground='#ffffff', activeforeground='#666666',
+                                            state='disabled')
+        self.fourier_radio.pack(side=tk.LEFT)
+        
+        # Main equations text area
+        text_container = tk.Frame(right_panel, bg='#ffffff')
+        text_container.pack(fill=tk.BOTH, expand=True, padx=25, pady=(0, 10))
+        
+        # Create a frame with scrollbar for equations
+        eq_frame = tk.Frame(text_container, bg='#ffffff')
+        eq_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Add scrollbar
+        eq_scrollbar = ttk.Scrollbar(eq_frame)
+        eq_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # One text widget per display mode, so switching modes swaps widgets
+        # instead of re-rendering text that was already built
+        self.equations_scrollbar = eq_scrollbar
+        self.equation_views = {
+            mode: EquationView(eq_frame, eq_scrollbar, wrap=tk.WORD, bg='#ffffff', fg='#333333',
+                               font=('Consolas', 11), bd=0, insertbackground='#ffd700',
+                               selectbackground='#ffd700', selectforeground='#333333',
+                               padx=20, pady=20, height=8)
+            for mode in ('parametric', 'fourier')
+        }
+        self.equation_view = None
+        self.show_equation_view('parametric')
+        
+        # Frame for Fourier coefficients table
+        self.coeff_container = tk.Frame(right_panel, bg='#ffffff')
+        
+        tk.Label(self.coeff_container, text="Fourier Coefficients Table", 
+                font=('Helvetica', 16, 'bold'), bg='#ffffff', fg='#b8860b').pack(anchor='w', pady=(0, 15))
+        
+        table_frame = tk.Frame(self.coeff_container, bg='#ffffff')
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.coeff_table = CoefficientTable(table_frame)
+        
+        # Compact Fourier controls
+        self.controls = tk.Frame(right_panel, bg='#fff8e1', highlightbackground='#ffd700',
+                                highlightthickness=2, relief=tk.RAISED, height=100)
+        
+        ctrl_inner = tk.Frame(self.controls, bg='#fff8e1')
+        ctrl_inner.pack(fill=tk.BOTH, expand=True, padx=25, pady=10)
+        
+        control_row1 = tk.Frame(ctrl_inner, bg='#fff8e1')
+        control_row1.pack(fill=tk.X, pady=(0, 5))
+        
+        tk.Label(control_row1, text="Fourier Harmonics:", bg='#fff8e1', 
+                fg='#b8860b', font=('Helvetica', 11, 'bold')).pack(side=tk.LEFT)
+        
+        self.harmonics_var = tk.IntVar(value=15)
+        harmonics_entry = tk.Entry(control_row1, textvariable=self.harmonics_var, 
+                                  width=6, font=('Helvetica', 11), justify='center',
+                                  bd=2, relief=tk.SOLID)
+        harmonics_entry.pack(side=tk.LEFT, padx=(10, 20))
+        harmonics_entry.bind('<Return>', lambda e: self.update_harmonics_from_entry())
+        
+        self.harmonics_scale = ttk.Scale(control_row1, from_=3, to=MAX_HARMONICS, orient=tk.HORIZONTAL,
+                                        variable=self.harmonics_var, 
+                                        command=lambda v: self.update_harmonics(float(v)),
+                                        length=200)
+        self.harmonics_scale.pack(side=tk.LEFT, padx=(0, 10), fill=tk.X, expand=True)
+        
+        # Where the spectrum comes from: the spline, or the raw stroke points
+        self.spectrum_var = tk.StringVar(value='spline')
+        spectrum_box = ttk.Combobox(control_row1, textvariable=self.spectrum_var,
+                                    values=list(SPECTRUM_METHODS), width=7, state='readonly')
+        spectrum_box.pack(side=tk.RIGHT)
+        spectrum_box.bind('<<ComboboxSelected>>', lambda e: self.refit_stroke())
+        tk.Label(control_row1, text="Fit to:", bg='#fff8e1', fg='#666666',
+                font=('Helvetica', 10)).pack(side=tk.RIGHT, padx=(10, 5))
+        
+        control_row2 = tk.Frame(ctrl_inner, bg='#fff8e1')
+        control_row2.pack(fill=tk.X)
+        
+        tk.Label(control_row2, text="Quick set:", bg='#fff8e1', fg='#666666',
+                font=('Helvetica', 10)).pack(side=tk.LEFT)
+        
+        for n in [5, 10, 15, 25, 35]:
+            btn = tk.Button(control_row2, text=f"{n}", command=lambda x=n: self.set_harmonics(x),
+                           bg='#ffd700', fg='#333333', font=('Helvetica', 9),
+                           width=3, relief=tk.FLAT, cursor='hand2',
+                           activebackground='#ffc800', padx=2, pady=1)
+            btn.pack(side=tk.LEFT, padx=3)
+        
+        # Automatic selection: fewest harmonics meeting an error tolerance
+        self.auto_harmonics_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(control_row2, text="Auto", variable=self.auto_harmonics_var,
+                      command=self.apply_auto_harmonics, bg='#fff8e1', fg='#b8860b',
+                      activebackground='#fff8e1', selectcolor='#ffffff',
+                      font=('Helvetica', 10, 'bold')).pack(side=tk.LEFT, padx=(20, 5))
+        
+        tk.Label(control_row2, text="Tolerance:", bg='#fff8e1', fg='#666666',
+                font=('Helvetica', 10)).pack(side=tk.LEFT)
+        
+        self.tolerance_entry = tk.Entry(control_row2, width=7, font=('Helvetica', 10),
+                                       bd=2, relief=tk.SOLID, justify='center')
+        self.tolerance_entry.insert(0, "0.01")
+        self.tolerance_entry.pack(side=tk.LEFT, padx=5)
+        self.tolerance_entry.bind('<Return>', lambda e: self.apply_auto_harmonics())
+        
+        self.error_metric_var = tk.StringVar(value='rms')
+        metric_box = ttk.Combobox(control_row2, textvariable=self.error_metric_var,
+                                  values=['rms', 'max'], width=4, state='readonly')
+        metric_box.pack(side=tk.LEFT)
+        metric_box.bind('<<ComboboxSelected>>', lambda e: self.apply_auto_harmonics())
+        
+        self.controls.pack_forget()
+        self.coeff_container.pack_forget()
+        
+        self.harmonics_scheduler = UpdateScheduler(self.root, self.compute_harmonics,
+                                                   self.apply_harmonics)
+        
+        self.show_initial_message()
+    
+    def set_x_range(self):
+        try:
+            value = float(self.x_range_entry.get())
+            if value <= 0:
+                raise ValueError("Range must be positive")
+            self.x_range = value
+            self.x_range_label.config(text=f"±{value:.2f}")
+            self.view = None
+            self.setup_canvas()
+            if self.parametric_curve is not None:
+                self.render_curve()
+            else:
+                self.refresh_canvas()
+            self.status_label.config(text=f"X-range set to ±{value:.2f}", fg='#1e88e5')
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter a positive number for X range")
+    
+    def set_y_range(self):
+        try:
+            value = float(self.y_range_entry.get())
+            if value <= 0:
+                raise ValueError("Range must be positive")
+            self.y_range = value
+            self.y_range_label.config(text=f"±{value:.2f}")
+            self.view = None
+            self.setup_canvas()
+            if self.parametric_curve is not None:
+                self.render_curve()
+            else:
+                self.refresh_canvas()
+            self.status_label.config(text=f"Y-range set to ±{value:.2f}", fg='#1e88e5')
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter a positive number for Y range")
+    
+    def set_both_ranges(self, x_val, y_val):
+        self.x_range = x_val
+        self.y_range = y_val
+        self.x_range_entry.delete(0, tk.END)
+        self.x_range_entry.insert(0, str(x_val))
+        self.y_range_entry.delete(0, tk.END)
+        self.y_range_entry.insert(0, str(y_val))
+        self.x_range_label.config(text=f"±{x_val:.2f}")
+        self.y_range_label.config(text=f"±{y_val:.2f}")
+        self.view = None
+        self.setup_canvas()
+        if self.parametric_curve is not None:
+            self.render_curve()
+        else:
+            self.refresh_canvas()
+        self.status_label.config(text=f"Range set to X:±{x_val:.2f}, Y:±{y_val:.2f}", fg='#1e88e5')
+    
+    @timed('setup_canvas')
+    def setup_canvas(self):
+        """Setup or reset the canvas with axes and grid.
+        
+        The grid layer is only rebuilt when the ranges change, and its limits
+        and ticks only when the view does; otherwise this just removes the
+        curve artists drawn on top of it.
+        """
+        self.clear_curve_artists()
+        if self.canvas_key == (self.x_range, self.y_range):
+            self.apply_view()
+            return
+        self.canvas_key = (self.x_range, self.y_range)
+        self.view_key = None
+        self.grid_lines = []
+        
+        self.ax.clear()
+        self.ax.set_facecolor('#ffffff')
+        self.ax.set_aspect('equal')
+        
+        # Format tick labels to show fewer decimals
+        from matplotlib.ticker import FuncFormatter
+        self.ax.xaxis.set_major_formatter(FuncFormatter(lambda x, p: f'{x:.{self.tick_decimals}f}' if abs(x) < 10 else f'{x:.0f}'))
+        self.ax.yaxis.set_major_formatter(FuncFormatter(lambda y, p: f'{y:.{self.tick_decimals}f}' if abs(y) < 10 else f'{y:.0f}'))
+        
+        # Add faint axis lines at x=0 and y=0
+        self.ax.axhline(y=0, color='#cccccc', linewidth=0.8, alpha=0.7, linestyle='-', zorder=0)
+        self.ax.axvline(x=0, color='#cccccc', linewidth=0.8, alpha=0.7, linestyle='-', zorder=0)
+        
+        # Add axis labels
+        self.ax.set_xlabel('x', fontsize=12, fontweight='bold', color='#b8860b')
+        self.ax.set_ylabel('y', fontsize=12, fontweight='bold', color='#b8860b')
+        
+        # Grid - lighter and more subtle
+        self.ax.grid(True, alpha=0.15, color='#ffd700', linewidth=0.5, linestyle='-', zorder=0)
+        
+        # Border
+        for spine in self.ax.spines.values():
+            spine.set_color('#ffd700')
+            spine.set_linewidth(3)
+        
+        # Add info about grid spacing in title
+        # The title changes with the display mode, so it is drawn with the curves
+        self.ax.title.set_animated(True)
+        self.apply_view()
+    
+    def view_limits(self):
+        """The visible (xmin, xmax, ymin, ymax)"""
+        if self.view is None:
+            return (-self.x_range, self.x_range, -self.y_range, self.y_range)
+        return self.view
+    
+    def apply_view(self):
+        """Set the axes limits, ticks and integer grid lines for the current view"""
+        limits = self.view_limits()
+        if self.view_key == limits:
+            return
+        self.view_key = limits
+        self.background = None
+        xmin, xmax, ymin, ymax = limits
+        self.ax.set_xlim(xmin, xmax)
+        self.ax.set_ylim(ymin, ymax)
+        
+        # About 10 squares across. Ticks sit on multiples of the spacing, so
+        # they stay put while panning
+        x_spacing = (xmax - xmin) / 10
+        y_spacing = (ymax - ymin) / 10
+        self.tick_decimals = max(1, int(np.ceil(-np.log10(min(x_spacing, y_spacing)))))
+        self.ax.set_xticks(self.grid_ticks(xmin, xmax, x_spacing))
+        self.ax.set_yticks(self.grid_ticks(ymin, ymax, y_spacing))
+        
+        # Major grid lines for integer values
+        for line in self.grid_lines:
+            line.remove()
+        self.grid_lines = []
+        major_x_ticks = np.arange(np.ceil(xmin), np.floor(xmax) + 1)
+        major_y_ticks = np.arange(np.ceil(ymin), np.floor(ymax) + 1)
+        
+        if len(major_x_ticks) <= MAX_GRID_LINES:
+            for tick in major_x_ticks:
+                self.grid_lines.append(self.ax.axvline(x=tick, color='#ffd700', linewidth=0.3, alpha=0.2,
+                                                       linestyle='-', zorder=0))
+        
+        if len(major_y_ticks) <= MAX_GRID_LINES:
+            for tick in major_y_ticks:
+                self.grid_lines.append(self.ax.axhline(y=tick, color='#ffd700', linewidth=0.3, alpha=0.2,
+                                                       linestyle='-', zorder=0))
+        self.set_grid_title()
+    
+    def grid_ticks(self, low, high, spacing):
+        ticks = np.arange(np.ceil(low / spacing - 1e-9), np.floor(high / spacing + 1e-9) + 1) * spacing
+        return ticks[np.abs(ticks) > 0.05 * spacing]  # Don't show 0 twice
+    
+    def set_grid_title(self):
+        xmin, xmax, ymin, ymax = self.view_limits()
+        d = self.tick_decimals
+        grid_info = f"Grid: x∈[{xmin:.{d}f},{xmax:.{d}f}], y∈[{ymin:.{d}f},{ymax:.{d}f}]"
+        self.ax.set_title(grid_info, fontsize=10, fontweight='normal', color='#666666', pad=10)
+    
+    def clear_curve_artists(self):
+        for artist in self.curve_artists:
+            artist.remove()
+        self.curve_artists = []
+        for line in self.ax.lines[:]:
+            if line.get_label() in ('_drawing', '_drawing_segment'):
+                line.remove()
+        self.set_grid_title()
+    
+    def add_curve_artist(self, artist):
+        """Register an artist that is redrawn over the cached background"""
+        artist.set_animated(True)
+        self.curve_artists.append(artist)
+        return artist
+    
+    def draw_curve_artists(self):
+        self.ax.draw_artist(self.ax.title)
+        for artist in self.curve_artists:
+            self.ax.draw_artist(artist)
+    
+    @timed('blit')
+    def refresh_canvas(self):
+        """Repaint the curve artists over the cached static background"""
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_curve_artists()
+        self.canvas.blit(self.fig.bbox)
+    
+    @timed('table')
+    def create_coefficients_table(self):
+        """Fill the Fourier coefficients table for the current harmonics"""
+        if self.fourier_curve is None:
+            self.coeff_table.clear()
+            return
+        
+        self.coeff_table.set_coefficients(*self.fourier_table(self.curve_key, self.fourier_curve,
+                                                              self.harmonics_var.get()))
+    
+    def set_harmonics(self, n):
+        self.harmonics_var.set(n)
+        self.update_harmonics(n)
+    
+    def harmonics_limit(self):
+        """Most harmonics the slider offers: the cap, or what the spectrum resolves"""
+        if self.fourier_curve is None:
+            return MAX_HARMONICS
+        return max(3, min(MAX_HARMONICS, max_harmonics(self.fourier_curve)))
+    
+    def apply_auto_harmonics(self):
+        """Pick the fewest harmonics meeting the tolerance, if Auto is on"""
+        if not self.auto_harmonics_var.get() or self.fourier_curve is None:
+            return
+        try:
+            tolerance = float(self.tolerance_entry.get())
+            if tolerance <= 0:
+                raise ValueError("Tolerance must be positive")
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter a positive number for the tolerance")
+            return
+        metric = self.error_metric_var.get()
+        n = select_harmonics(self.fourier_curve, tolerance, metric, min_harmonics=3)
+        n = min(n, self.harmonics_limit())
+        self.set_harmonics(n)
+        label = "RMS error" if metric == 'rms' else "max deviation"
+        self.status_label.config(text=f"Auto: {n} harmonics for {label} ≤ {tolerance:g}", fg='#e53935')
+    
+    def update_harmonics_from_entry(self):
+        try:
+            n = self.harmonics_var.get()
+            if n < 3:
+                n = 3
+                self.harmonics_var.set(3)
+            elif n > self.harmonics_limit():
+                n = self.harmonics_limit()
+                self.harmonics_var.set(n)
+            self.update_harmonics(n)
+        except:
+            self.harmonics_var.set(15)
+            self.update_harmonics(15)
+    
+    def on_double_click(self, event):
+        if event.dblclick and self.drawing:
+            self.drawing = False
+            self.process_stroke()
+    
+    def show_initial_message(self):
+        self.show_equation_view('parametric').clear()
+        
+        self.equations_text.insert('1.0', "Welcome to CurveCraft\n\n", 'title')
+        self.equations_text.insert(tk.END, "Draw any shape on the canvas and watch it transform into mathematical expressions.\n\n", 'info')
+        
+        self.equations_text.insert(tk.END, "What You'll Get:\n\n", 'header')
+        self.equations_text.insert(tk.END, "  • Parametric equations: ", 'info')
+        self.equations_text.insert(tk.END, "x(t)", 'equation')
+        self.equations_text.insert(tk.END, " and ", 'info')
+        self.equations_text.insert(tk.END, "y(t)\n", 'equation')
+        self.equations_text.insert(tk.END, "  • Cubic polynomial coefficients for each segment\n", 'info')
+        self.equations_text.insert(tk.END, "  • Fourier series approximation (for closed curves)\n", 'info')
+        self.equations_text.insert(tk.END, "  • Interactive harmonic control\n", 'info')
+        self.equations_text.insert(tk.END, "  • Scrollable Fourier coefficients table\n\n", 'info')
+        
+        self.equations_text.insert(tk.END, "Quick Start:\n\n", 'header')
+        self.equations_text.insert(tk.END, "1. ", 'highlight')
+        self.equations_text.insert(tk.END, "Set X and Y ranges above the canvas\n", 'info')
+        self.equations_text.insert(tk.END, "2. ", 'highlight')
+        self.equations_text.insert(tk.END, "Draw a shape on the canvas\n", 'info')
+        self.equations_text.insert(tk.END, "3. ", 'highlight')
+        self.equations_text.insert(tk.END, "View parametric equations automatically\n", 'info')
+        self.equations_text.insert(tk.END, "4. ", 'highlight')
+        self.equations_text.insert(tk.END, "For closed curves, switch to Fourier mode\n", 'info')
+        
+        self.equations_text.insert(tk.END, "Tips:\n\n", 'header')
+        self.equations_text.insert(tk.END, "  • Use presets or enter custom ranges\n", 'highlight')
+        self.equations_text.insert(tk.END, "  • Each square represents 0.2 units (default)\n", 'highlight')
+        self.equations_text.insert(tk.END, "  • Draw slowly for smoother curves\n", 'highlight')
+        self.equations_text.insert(tk.END, "  • Close your shape for Fourier analysis\n", 'highlight')
+        self.equations_text.insert(tk.END, "  • Earlier curves stay on the canvas; right-click one to select it\n", 'highlight')
+        self.equations_text.insert(tk.END, "  • Scroll to zoom; drag with the middle button or Shift held to pan\n", 'highlight')
+        
+        self.equations_text.config(state='disabled')
+    
+    def on_press(self, event):
+        if event.inaxes != self.ax:
+            return
+        if event.button == 2 or (event.button == 1 and event.key == 'shift'):
+            if not self.drawing:
+                self.pan_start = (event.x, event.y, self.view_limits())
+            return
+        if event.button == 3:
+            hit = None if self.drawing else self.hit_test(event)
+            if hit is not None:
+                self.select_curve(hit)
+            return
+        self.drawing = True
+        # The fitter collects into raw_points and smooths/simplifies as they arrive
+        self.stroke_fitter = StreamingFitter(self.x_range, self.y_range,
+                                             self.simplify_var.get(), points=self.raw_points)
+        self.stroke_fitter.append(event.xdata, event.ydata)
+        self.start_live_stroke()
+
+    def on_motion(self, event):
+        if self.pan_start is not None:
+            self.pan(event)
+            return
+        if not self.drawing:
+            self.hover(event)
+            return
+        if event.inaxes != self.ax:
+            return
+        if len(self.raw_points) > 0 and event.xdata and event.ydata:
+            last = self.raw_points[-1]
+            dist = np.sqrt((event.xdata - last[0])**2 + (event.ydata - last[1])**2)
+            if dist > 0.01 * min(self.x_range, self.y_range):
+                self.stroke_fitter.append(event.xdata, event.ydata)
+                self.render_drawing_segment()
+        
+    def on_release(self, event):
+        if self.pan_start is not None:
+            self.pan_start = None
+            return
+        if not self.drawing:
+            return
+        self.drawing = False
+        
+        if len(self.raw_points) < 5:
+            self.warn("Too Short", "Draw a longer curve! Try making a complete shape.")
+            if self.active_curve is None:
+                self.reset()
+            else:
+                self.select_curve(self.active_curve)
+            return
+            
+        self.process_stroke()
+        
+    def on_scroll(self, event):
+        """Zoom the view about the cursor"""
+        if event.inaxes != self.ax or self.drawing or self.pan_start is not None:
+            return
+        factor = ZOOM_FACTOR ** -event.step
+        xmin, xmax, ymin, ymax = self.view_limits()
+        x, y = event.xdata, event.ydata
+        self.navigate((x - (x - xmin) * factor, x + (xmax - x) * factor,
+                       y - (y - ymin) * factor, y + (ymax - y) * factor))
+    
+    def pan(self, event):
+        """Move the view with the mouse while a pan drag is in progress"""
+        x0, y0, (xmin, xmax, ymin, ymax) = self.pan_start
+        # Pixel offsets, since data coordinates move with the view
+        bbox = self.ax.bbox
+        dx = (event.x - x0) * (xmax - xmin) / bbox.width
+        dy = (event.y - y0) * (ymax - ymin) / bbox.height
+        self.navigate((xmin - dx, xmax - dx, ymin - dy, ymax - dy))
+    
+    def navigate(self, view):
+        """Show a new view; redraws are coalesced to one per idle period"""
+        self.view = view
+        if not self.navigation_pending:
+            self.navigation_pending = True
+            self.root.after_idle(self.apply_navigation)
+    
+    @timed('navigate')
+    def apply_navigation(self):
+        self.navigation_pending = False
+        if self.parametric_curve is not None:
+            self.render_curve()
+        else:
+            self.setup_canvas()
+            self.refresh_canvas()
+    
+    def warn(self, title, message):
+        # Session replays replace this so a dialog can't block them
+        messagebox.showwarning(title, message)
+    
+    def busy(self):
+        """Whether rendering work is still deferred to later Tk callbacks"""
+        return self.navigation_pending or self.refine_pending or self.harmonics_scheduler.busy
+    
+    def start_live_stroke(self):
+        """Create the animated artists used to draw the stroke in progress.
+
+        Both lines are excluded from normal figure draws. While drawing, each
+        new segment is painted straight onto the rendered canvas and only its
+        bounding box is blitted, so the per-event cost does not grow with the
+        stroke length. The full stroke line is only needed when the figure is
+        redrawn from scratch (see on_draw).
+        """
+        for line in self.ax.lines[:]:
+            if line.get_label() in ('_drawing', '_drawing_segment'):
+                line.remove()
+        x, y = self.raw_points[0]
+        style = dict(color='#ff9800', linewidth=4, solid_capstyle='round', animated=True)
+        self.drawing_line, = self.ax.plot([x], [y], label='_drawing', **style)
+        self.segment_line, = self.ax.plot([x, x], [y, y], label='_drawing_segment', **style)
+
+    def render_drawing_segment(self):
+        """Blit the newest stroke segment on top of the current canvas"""
+        from matplotlib.transforms import Bbox
+        segment = self.raw_points[-2:]
+        (x0, y0), (x1, y1) = segment
+        self.segment_line.set_data(segment[:, 0], segment[:, 1])
+        self.ax.draw_artist(self.segment_line)
+
+        (px0, py0), (px1, py1) = self.ax.transData.transform([(x0, y0), (x1, y1)])
+        pad = self.segment_line.get_linewidth() * self.fig.dpi / 72 + 2
+        self.canvas.blit(Bbox.from_extents(min(px0, px1) - pad, min(py0, py1) - pad,
+                                           max(px0, px1) + pad, max(py0, py1) + pad))
+
+    def render_drawing(self):
+        """Draw the whole stroke in progress, e.g. after a full figure redraw"""
+        if len(self.raw_points) < 2:
+            return
+        points = self.raw_points.points
+        self.drawing_line.set_data(points[:, 0], points[:, 1])
+        self.ax.draw_artist(self.drawing_line)
+        self.canvas.blit(self.ax.bbox)
+
+    @timed('blit')
+    def on_draw(self, event):
+        # Full redraws only paint the static layer: keep its pixels for
+        # refresh_canvas, then draw the animated curves and stroke on top
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_curve_artists()
+        self.canvas.blit(self.fig.bbox)
+        if self.drawing:
+            self.render_drawing()
+        
+    def refit_stroke(self):
+        # Refit the active stroke after a fitting option changed
+        if self.parametric_curve is not None and not self.drawing:
+            self.stroke_fitter = None
+            self.process_stroke()
+    
+    @timed('process_stroke')
+    def process_stroke(self):
+        simplify = self.simplify_var.get()
+        spectrum = self.spectrum_var.get()
+        self.curve_key = (stroke_digest(self.raw_points.points), self.x_range, self.y_range,
+                          simplify, spectrum)
+        fit = self.artifacts.get(('fit', self.curve_key))
+        if fit is None:
+            if self.stroke_fitter is not None:
+                fit = self.stroke_fitter.fit(spectrum=spectrum)
+            else:
+                fit = fit_curve(self.raw_points, self.x_range, self.y_range, simplify=simplify,
+                                spectrum=spectrum)
+            self.artifacts.put(('fit', self.curve_key), fit)
+        self.curve_fit = fit
+        self.x_spline = fit.x_spline
+        self.y_spline = fit.y_spline
+        
+        # A finished stroke joins the scene; refits replace the active curve.
+        # Its plot samples are kept per zoom level until the fit changes
+        new_curve = self.stroke_fitter is not None or self.active_curve not in self.scene
+        stored = None if new_curve else self.scene.data(self.active_curve)
+        if stored is None or stored['key'] != self.curve_key:
+            stored = {'points': self.raw_points.points.copy(), 'simplify': simplify, 'spectrum': spectrum,
+                      'key': self.curve_key, 'lod': PolylineLOD.from_splines(fit.x_spline, fit.y_spline)}
+        self.curve_lod = stored['lod']
+        polyline = np.column_stack(self.spline_samples())
+        if new_curve:
+            self.active_curve = self.scene.add(polyline, stored)
+        else:
+            self.scene.update(self.active_curve, polyline, stored)
+        self.stroke_fitter = None
+        self.hover_curve = None
+        
+        self.is_closed = fit.is_closed
+        self.parametric_curve = {'t': fit.t, 'x': fit.x, 'y': fit.y}
+        t = fit.t
+        
+        if self.is_closed:
+            self.fourier_curve = fit.fourier
+            self.harmonics_scale.config(to=self.harmonics_limit())
+            if self.harmonics_var.get() > self.harmonics_limit():
+                self.harmonics_var.set(self.harmonics_limit())
+            self.apply_auto_harmonics()
+            self.create_coefficients_table()
+            if 'residual' in self.fourier_curve:
+                source = (f"{self.fourier_curve['method']} fit to {len(self.raw_points)} points, "
+                          f"residual {self.fourier_curve['residual']:.2e}")
+            else:
+                source = f"n={self.fourier_curve['n']}"
+            self.status_label.config(text=f"Closed curve detected | {len(t)} control points | Fourier available "
+                                          f"({source}) | {len(self.scene)} curves on canvas", fg='#43a047')
+            self.fourier_radio.config(state='normal', fg='#333333')
+        else:
+            self.fourier_curve = None
+            self.status_label.config(text=f"Open curve | {len(t)} control points | "
+                                          f"{len(self.scene)} curves on canvas", fg='#1e88e5')
+            self.fourier_radio.config(state='disabled', fg='#cccccc')
+            self.mode_var.set('parametric')
+            self.show_mode = 'parametric'
+            self.controls.pack_forget()
+            self.coeff_container.pack_forget()
+        
+        self.update_equations_display()
+        self.render_curve()
+    
+    def select_curve(self, curve):
+        """Make a curve in the scene the active one, refitting it from its stroke"""
+        stored = self.scene.data(curve)
+        self.raw_points.clear()
+        self.raw_points.extend(stored['points'])
+        self.simplify_var.set(stored['simplify'])
+        self.spectrum_var.set(stored['spectrum'])
+        self.stroke_fitter = None
+        self.active_curve = curve
+        self.process_stroke()
+    
+    def hit_test(self, event):
+        """Id of the scene curve under the mouse, if any"""
+        if event.inaxes != self.ax or event.xdata is None:
+            return None
+        with stage('hit_test'):
+            xmin, xmax, ymin, ymax = self.view_limits()
+            return self.scene.hit_test(event.xdata, event.ydata,
+                                       HIT_TOLERANCE * min(xmax - xmin, ymax - ymin) / 2)
+    
+    def hover(self, event):
+        """Highlight the inactive curve under the mouse"""
+        if self.hover_line is None:
+            return
+        hit = self.hit_test(event)
+        if hit == self.active_curve:
+            hit = None
+        if hit == self.hover_curve:
+            return
+        self.hover_curve = hit
+        points = self.scene.points(hit) if hit is not None else np.empty((0, 2))
+        self.hover_line.set_data(points[:, 0], points[:, 1])
+        self.refresh_canvas()
+    
+    def visible_curves(self):
+        """Ids of the inactive scene curves that intersect the viewport"""
+        xmin, xmax, ymin, ymax = self.view_limits()
+        with stage('cull'):
+            ids = self.scene.query(xmin, ymin, xmax, ymax)
+            return ids[ids != self.active_curve] if self.active_curve is not None else ids
+    
+    def show_equation_view(self, mode):
+        view = self.equation_views[mode]
+        if view is self.equation_view:
+            return view
+        if self.equation_view is not None:
+            self.equation_view.text.pack_forget()
+        view.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.equations_scrollbar.config(command=view.text.yview)
+        self.equations_scrollbar.set(*view.text.yview())
+        self.equation_view = view
+        self.equations_text = view.text
+        return view
+    
+    def equation_document(self, mode, harmonics=None):
+        """Formatted equations for the current curve"""
+        if mode == 'fourier':
+            return self.fourier_equations(self.curve_key, self.fourier_curve, harmonics)
+        
+        def build():
+            with stage('format'):
+                return parametric_document(self.parametric_curve['t'], self.x_spline,
+                                           self.y_spline, self.is_closed)
+        return self.artifacts.get_or_compute(('equations', self.curve_key, 'parametric'), build)
+    
+    # The artifact helpers below take the curve key and spectrum explicitly
+    # because compute_harmonics calls them from the worker thread
+    
+    def fourier_equations(self, key, fourier, harmonics):
+        def build():
+            with stage('format'):
+                return fourier_document(fourier, harmonics)
+        return self.artifacts.get_or_compute(('equations', key, 'fourier', harmonics), build)
+    
+    def fourier_samples(self, key, fourier, harmonics, scale):
+        """The truncated Fourier series sampled for plotting at ``scale`` pixels per unit"""
+        def build():
+            with stage('evaluate'):
+                return fourier_plot_samples(fourier, harmonics, scale)
+        return self.artifacts.get_or_compute(('fourier_xy', key, harmonics, scale), build)
+    
+    def fourier_table(self, key, fourier, harmonics):
+        """Coefficient table rows: (a, b, c, d, rms truncation errors)"""
+        def build():
+            return (*fourier_coefficients(fourier, harmonics), truncation_errors(fourier)[0])
+        return self.artifacts.get_or_compute(('table', key, harmonics), build)
+    
+    def spline_samples(self):
+        """The parametric spline sampled for plotting at the current zoom level"""
+        with stage('evaluate'):
+            polyline = self.curve_lod.polyline(self.plot_scale())
+        return polyline[:, 0], polyline[:, 1]
+    
+    def plot_scale(self):
+        """Pixels per data unit on the canvas, rounded up to a zoom level.
+        
+        Curves are sampled adaptively to a pixel tolerance (see
+        adaptive_samples), so samples depend on the scale; rounding it up to
+        a zoom level lets nearby canvas sizes and views share cached samples
+        while still meeting the tolerance.
+        """
+        xmin, xmax, ymin, ymax = self.view_limits()
+        bbox = self.ax.bbox
+        scale = max(bbox.width / (xmax - xmin), bbox.height / (ymax - ymin), 1.0)
+        return level_scale(zoom_level(scale))
+    
+    def curve_polylines(self, ids, scale):
+        """Polylines of scene curves at ``scale``, and the ids still drawn at another level.
+        
+        Missing levels are derived for LOD_BUDGET seconds; past that, curves
+        use whatever level they have cached (or their scene polyline) and
+        are left for refine_curves.
+        """
+        deadline = time.perf_counter() + LOD_BUDGET
+        polylines, pending = [], []
+        with stage('evaluate'):
+            for i in ids:
+                lod = self.scene.data(i)['lod']
+                if time.perf_counter() < deadline:
+                    polylines.append(lod.polyline(scale))
+                    continue
+                polyline = lod.cached(scale)
+                polylines.append(self.scene.points(i) if polyline is None else polyline)
+                pending.append(i)
+        return polylines, pending
+    
+    def refine_curves(self):
+        """Sample the visible curves left pending by render_curve, a budget's worth per idle call"""
+        self.refine_pending = False
+        if self.others_collection is None or self.others_collection.axes is None:
+            return
+        ids = self.visible_curves()
+        polylines, pending = self.curve_polylines(ids, self.plot_scale())
+        self.others_collection.set_segments(polylines)
+        self.refresh_canvas()
+        if pending:
+            self.refine_pending = True
+            self.root.after(1, self.refine_curves)
+    
+    def update_equations_display(self):
+        if self.parametric_curve is None:
+            self.show_initial_message()
+            return
+        
+        if self.show_mode == 'fourier' and self.fourier_curve is not None:
+            self.show_equations('fourier', self.equation_document('fourier', self.harmonics_var.get()))
+        else:
+            self.show_equations('parametric', self.equation_document('parametric'))
+    
+    @timed('text')
+    def show_equations(self, mode, document):
+        self.show_equation_view(mode).show(document)
+    
+    def change_mode(self):
+        self.show_mode = self.mode_var.get()
+        
+        if self.show_mode == 'fourier' and self.fourier_curve is not None:
+            self.controls.pack(fill=tk.X, padx=25, pady=(10, 5), side=tk.BOTTOM)
+            self.coeff_container.pack(fill=tk.BOTH, expand=True, padx=25, pady=(0, 10), before=self.controls)
+            self.create_coefficients_table()
+            self.status_label.config(text=f"Fourier mode: {self.harmonics_var.get()} harmonics | Scroll to see all coefficients", fg='#e53935')
+        else:
+            self.controls.pack_forget()
+            self.coeff_container.pack_forget()
+            if self.is_closed:
+                self.status_label.config(text="Parametric mode: Piecewise cubic polynomials", fg='#1e88e5')
+            else:
+                self.status_label.config(text="Parametric mode: Open curve", fg='#1e88e5')
+        
+        if self.parametric_curve is not None:
+            self.update_equations_display()
+            self.render_curve()
+    
+    def update_harmonics(self, value):
+        try:
+            n = int(float(value))
+        except (TypeError, ValueError):
+            return
+        n = min(n, self.harmonics_limit())
+        self.harmonics_var.set(n)
+        if self.show_mode == 'fourier' and self.fourier_curve is not None:
+            self.harmonics_scheduler.submit(self.curve_key, self.fourier_curve, n, self.plot_scale())
+    
+    def compute_harmonics(self, key, fourier, harmonics, scale):
+        # Runs on the scheduler's worker thread: no Tk calls here
+        return {
+            'fourier': fourier,
+            'harmonics': harmonics,
+            'xy': self.fourier_samples(key, fourier, harmonics, scale),
+            'equations': self.fourier_equations(key, fourier, harmonics),
+            'coefficients': self.fourier_table(key, fourier, harmonics),
+        }
+    
+    def apply_harmonics(self, result):
+        if result['fourier'] is not self.fourier_curve or self.show_mode != 'fourier':
+            return
+        self.show_equations('fourier', result['equations'])
+        self.render_curve(fourier_xy=result['xy'], harmonics=result['harmonics'])
+        self.coeff_table.set_coefficients(*result['coefficients'])
+    
+    @timed('render_curve')
+    def render_curve(self, fourier_xy=None, harmonics=None):
+        self.setup_canvas()
+        
+        if self.parametric_curve is None:
+            self.refresh_canvas()
+            return
+        
+        # Earlier curves, culled to the viewport and drawn as one collection
+        from matplotlib.collections import LineCollection
+        others = self.visible_curves()
+        self.others_collection = None
+        if len(others):
+            polylines, pending = self.curve_polylines(others, self.plot_scale())
+            self.others_collection = LineCollection(polylines, colors='#90a4ae', linewidths=1.5, alpha=0.6)
+            self.add_curve_artist(self.ax.add_collection(self.others_collection, autolim=False))
+            if pending and not self.refine_pending:
+                self.refine_pending = True
+                self.root.after(1, self.refine_curves)
+        self.hover_line = self.add_curve_artist(*self.ax.plot([], [], color='#ff9800', linewidth=2.5,
+                                                              alpha=0.8))
+        self.hover_curve = None
+        
+        if self.show_mode == 'parametric':
+            x_fine, y_fine = self.spline_samples()
+            
+            self.add_curve_artist(*self.ax.plot(x_fine, y_fine, color='#1e88e5', linewidth=3, alpha=0.9, label='Spline'))
+            
+            x = self.parametric_curve['x']
+            y = self.parametric_curve['y']
+            self.add_curve_artist(self.ax.scatter(x, y, color='#ff9800', s=50, alpha=0.7, label='Control Points'))
+            
+            self.add_curve_artist(self.ax.legend(loc='upper right', fontsize=9))
+            self.ax.set_title("Parametric Cubic Spline", fontsize=14, fontweight='bold', color='#1e88e5')
+            
+        elif self.show_mode == 'fourier' and self.fourier_curve is not None:
+            if fourier_xy is None:
+                harmonics = self.harmonics_var.get()
+                fourier_xy = self.fourier_samples(self.curve_key, self.fourier_curve, harmonics,
+                                                  self.plot_scale())
+            x_fourier, y_fourier = fourier_xy
+            
+            self.add_curve_artist(*self.ax.plot(x_fourier, y_fourier, color='#e53935', linewidth=3, alpha=0.9, 
+                                                label=f'Fourier ({harmonics} harmonics)'))
+            
+            x_original, y_original = self.spline_samples()
+            self.add_curve_artist(*self.ax.plot(x_original, y_original, color='#1e88e5', linewidth=2, 
+                                                alpha=0.4, linestyle='--', label='Original'))
+            
+            self.add_curve_artist(self.ax.legend(loc='upper right', fontsize=9))
+            self.ax.set_title("Fourier Series Approximation", fontsize=14, fontweight='bold', color='#e53935')
+        
+        self.refresh_canvas()
+    
+    def reset(self):
+        self.raw_points.clear()
+        self.scene.clear()
+        self.active_curve = None
+        self.curve_lod = None
+        self.hover_curve = None
+        self.hover_line = None
+        self.others_collection = None
+        self.view = None
+        self.stroke_fitter = None
+        self.drawing = False
+        self.curve_fit = None
+        self.parametric_curve = None
+        self.fourier_curve = None
+        self.is_closed = False
+        
+        self.setup_canvas()
+        self.refresh_canvas()
+        
+        self.show_initial_message()
+        self.status_label.config(text="Click and drag to draw your curve", fg='#d4a017')
+        self.fourier_radio.config(state='disabled', fg='#cccccc')
+        self.mode_var.set('parametric')
+        self.show_mode = 'parametric'
+        self.controls.pack_forget()
+        self.coeff_container.pack_forget()
+    
+    def toggle_timings(self):
+        if self.timing_label.winfo_ismapped():
+            self.timing_label.place_forget()
+        else:
+            self.timing_label.place(relx=0, rely=1, anchor='sw')
+            self.update_timings()
+    
+    def update_timings(self):
+        """Show the latest milliseconds per stage while the overlay is visible"""
+        if not self.timing_label.winfo_ismapped():
+            return
+        latest = profiler.latest(TIMING_STAGES)
+        text = "  ".join(f"{name} {ms:.1f}" for name, ms in latest.items())
+        cache = self.artifacts.stats()
+        self.timing_label.config(text=f"{text or 'no timings yet'}  (ms, click to export trace)\n"
+                                      f"cache {cache['entries']} items {cache['bytes'] / 2**20:.1f} MB  "
+                                      f"hits {cache['hits']}  misses {cache['misses']}  "
+                                      f"evictions {cache['evictions']}")
+        self.root.after(TIMING_POLL_MS, self.update_timings)
+    
+    def export_trace(self, path=None):
+        if path is None:
+            path = filedialog.asksaveasfilename(title="Export Chrome Trace", defaultextension='.json',
+                                                filetypes=[("Chrome trace", "*.json")])
+            if not path:
+                return
+        profiler.export_chrome_trace(path)
+        self.status_label.config(text=f"Trace of {len(profiler.records)} timings saved to {path}",
+                                 fg='#43a047')
+    
+    def save_curve(self):
+        """Write the fitted curve, with the current harmonics, to a curve file"""
+        if self.curve_fit is None:
+            messagebox.showinfo("No Curve", "Please draw a curve first!")
+            return
+        path = filedialog.asksaveasfilename(title="Save Curve", defaultextension=STORE_EXTENSION,
+                                            filetypes=[("CurveCraft curves", f"*{STORE_EXTENSION}")])
+        if not path:
+            return
+        metadata = {'x_range': self.x_range, 'y_range': self.y_range,
+                    'simplify': self.simplify_var.get(), 'spectrum': self.spectrum_var.get()}
+        with CurveWriter(path, metadata) as writer:
+            writer.add(self.curve_fit, self.harmonics_var.get(), {'points': len(self.raw_points)})
+        self.status_label.config(text=f"Curve saved to {path}", fg='#43a047')
+    
+    def copy_equations(self):
+        if self.parametric_curve is None:
+            messagebox.showinfo("No Equations", "Please draw a curve first!")
+            return
+        
+        # The document holds every section, including pages not rendered yet
+        text = self.equation_view.full_text()
+        self.root.clipboard_clear()
+        self.root.clipboard_append(text.strip())
+        
+        original_text = self.status_label.cget("text")
+        self.status_label.config(text="Equations copied to clipboard!", fg='#43a047')
+        self.root.after(2000, lambda: self.status_label.config(text=original_text))
@@ -0,0 +1,136 @@
+"""Low-overhead stage timing for the CurveCraft pipeline.
+
+Pipeline stages are wrapped in ``with stage('name'):`` blocks. Each one
+appends a (name, start, duration, thread) record to a fixed-size ring
+buffer, so timing is always on and memory stays bounded. The buffer can be
+summarized for the GUI's timing overlay or exported as a Chrome trace
+(load it in chrome://tracing or https://ui.perfetto.dev)::
+
+    from curvecraft_profile import profiler, stage
+
+    with stage('spline'):
+        ...
+    profiler.latest()                    # {'spline': 0.42, ...} in ms
+    profiler.export_chrome_trace('trace.json')
+
+Only the standard library is used, so the engine can import it headless.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+RING_SIZE = 4096
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.profiler.records.append((self.name, self.start, end - self.start, threading.get_ident()))
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class Profiler:
+    """Ring buffer of the most recent stage timings"""
+
+    def __init__(self, capacity=RING_SIZE):
+        self.enabled = True
+        self.records = deque(maxlen=capacity)  # appends are atomic, so threads may share it
+        self.origin = time.perf_counter_ns()
+
+    def stage(self, name):
+        """Context manager timing one run of the stage ``name``"""
+        return _Stage(self, name) if self.enabled else _NO_STAGE
+
+    def record(self, name, start_ns, end_ns=None):
+        """Record a stage measured by the caller with ``time.perf_counter_ns()``;
+        ``end_ns`` defaults to now"""
+        if end_ns is None:
+            end_ns = time.perf_counter_ns()
+        if self.enabled:
+            self.records.append((name, start_ns, end_ns - start_ns, threading.get_ident()))
+
+    def timed(self, name):
+        """Decorator timing every call of a function as the stage ``name``"""
+        def decorate(func):
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            wrapper.__wrapped__ = func
+            return wrapper
+        return decorate
+
+    def clear(self):
+        self.records.clear()
+
+    def latest(self, names=None):
+        """Milliseconds taken by the most recent run of each stage"""
+        latest = {}
+        for name, _, duration, _ in reversed(list(self.records)):
+            if name not in latest:
+                latest[name] = duration / 1e6
+        if names is not None:
+            return {name: latest[name] for name in names if name in latest}
+        return latest
+
+    def summary(self):
+        """Per-stage count, mean and max milliseconds over the buffer"""
+        stats = {}
+        for name, _, duration, _ in list(self.records):
+            count, total, peak = stats.get(name, (0, 0, 0))
+            stats[name] = (count + 1, total + duration, max(peak, duration))
+        return {name: {'count': count, 'mean_ms': total / count / 1e6, 'max_ms': peak / 1e6}
+                for name, (count, total, peak) in stats.items()}
+
+    def chrome_trace(self):
+        """The buffer as a Chrome trace event dictionary"""
+        pid = os.getpid()
+        records = list(self.records)
+        # Stages recorded by the caller may have started before this module loaded
+        origin = min([self.origin] + [start for _, start, _, _ in records])
+        threads = {}
+        events = []
+        for name, start, duration, thread in records:
+            tid = threads.setdefault(thread, len(threads) + 1)
+            events.append({'name': name, 'cat': 'curvecraft', 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (start - origin) / 1e3, 'dur': duration / 1e3})
+        main = threading.main_thread().ident
+        for thread, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': 'main' if thread == main else f'worker-{tid}'}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+profiler = Profiler()
+stage = profiler.stage
+timed = profiler.timed
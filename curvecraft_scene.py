@@ -0,0 +1,288 @@
+"""Many fitted curves on one canvas, with a spatial index.
+
+Each curve is kept as a sampled polyline plus an arbitrary payload. Its
+bounding box goes into NumPy arrays and into a uniform grid of square cells,
+so viewport culling and hit-testing only look at curves near the query
+instead of the whole scene::
+
+    scene = Scene()
+    i = scene.add(np.column_stack([fit.x_spline(t), fit.y_spline(t)]), data=fit)
+    scene.query(-1.2, -1.2, 1.2, 1.2)      # ids of curves in the viewport
+    scene.hit_test(x, y, tolerance=0.02)   # nearest curve under the cursor, or None
+
+The cell size follows the typical curve size: the grid is rebuilt with the
+median bounding-box extent whenever the number of curves has doubled since
+the last build. Curves whose box would cover more than MAX_BOX_CELLS cells
+stay out of the grid and are checked by every query instead.
+
+:class:`PolylineLOD` keeps a curve's plot samples at a few zoom levels, so
+panning reuses them and zooming derives the new level from a neighbouring
+one instead of sampling from scratch::
+
+    lod = PolylineLOD.from_splines(fit.x_spline, fit.y_spline)
+    lod.polyline(scale)                    # (N, 2) within half a pixel at `scale` px/unit
+"""
+import numpy as np
+
+from curvecraft_engine import (PLOT_MIN_SAMPLES, PLOT_TOLERANCE, refine_samples, simplify_rdp,
+                               spline_seeds)
+
+DEFAULT_CELL_SIZE = 0.25
+MIN_CELL_SIZE = 1e-6
+MAX_BOX_CELLS = 64  # larger boxes are kept in a list scanned by every query
+ZOOM_STEPS = 4  # zoom levels per doubling of the pixel scale
+LOD_LEVELS = 4  # zoom levels kept per curve
+LOD_REUSE = 2 * ZOOM_STEPS  # a finer level this close is drawn as is rather than thinned
+_KEEP = object()
+
+
+def zoom_level(scale):
+    """The zoom level whose scale is the smallest at or above ``scale`` pixels per unit"""
+    return int(np.ceil(ZOOM_STEPS * np.log2(scale) - 1e-9))
+
+
+def level_scale(level):
+    return 2.0 ** (level / ZOOM_STEPS)
+
+
+class Scene:
+    """Curves with bounding boxes indexed by a uniform grid.
+
+    Ids are small integers handed out by :meth:`add` and never reused, so
+    they can index per-curve arrays kept by the caller.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._boxes = np.empty((64, 4))  # xmin, ymin, xmax, ymax
+        self._alive = np.zeros(64, dtype=bool)
+        self._points = []
+        self._data = []
+        self._cells = {}  # (column, row) -> list of ids
+        self._large = set()  # ids whose box spans more than MAX_BOX_CELLS cells
+        self._count = 0
+        self._built_for = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(np.flatnonzero(self._alive[:len(self._points)]).tolist())
+
+    def __contains__(self, i):
+        return isinstance(i, (int, np.integer)) and 0 <= i < len(self._points) and bool(self._alive[i])
+
+    def points(self, i):
+        return self._points[i]
+
+    def data(self, i):
+        return self._data[i]
+
+    def bbox(self, i):
+        return tuple(self._boxes[i])
+
+    def _cell_range(self, xmin, ymin, xmax, ymax):
+        size = self.cell_size
+        return (int(np.floor(xmin / size)), int(np.floor(ymin / size)),
+                int(np.floor(xmax / size)), int(np.floor(ymax / size)))
+
+    def _insert(self, i):
+        c0, r0, c1, r1 = self._cell_range(*self._boxes[i])
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > MAX_BOX_CELLS:
+            self._large.add(i)
+            return
+        for column in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                self._cells.setdefault((column, row), []).append(i)
+
+    def _unlink(self, i):
+        if i in self._large:
+            self._large.discard(i)
+            return
+        c0, r0, c1, r1 = self._cell_range(*self._boxes[i])
+        for column in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                cell = self._cells[(column, row)]
+                cell.remove(i)
+                if not cell:
+                    del self._cells[(column, row)]
+
+    def add(self, points, data=None):
+        """Add a curve sampled as an (N, 2) polyline and return its id"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if not len(points):
+            raise ValueError("A curve needs at least one point")
+        i = len(self._points)
+        if i == len(self._boxes):
+            self._boxes = np.concatenate([self._boxes, np.empty_like(self._boxes)])
+            self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+        self._points.append(points)
+        self._data.append(data)
+        self._boxes[i] = *points.min(axis=0), *points.max(axis=0)
+        self._alive[i] = True
+        self._count += 1
+        if self._count >= 2 * max(self._built_for, 16):
+            self.rebuild()
+        else:
+            self._insert(i)
+        return i
+
+    def update(self, i, points, data=_KEEP):
+        """Replace curve ``i``'s polyline, and its payload if given"""
+        if i not in self:
+            raise KeyError(i)
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self._unlink(i)
+        self._points[i] = points
+        if data is not _KEEP:
+            self._data[i] = data
+        self._boxes[i] = *points.min(axis=0), *points.max(axis=0)
+        self._insert(i)
+
+    def remove(self, i):
+        if i not in self:
+            raise KeyError(i)
+        self._unlink(i)
+        self._alive[i] = False
+        self._points[i] = self._data[i] = None
+        self._count -= 1
+
+    def clear(self):
+        self.__init__(self.cell_size)
+
+    def rebuild(self, cell_size=None):
+        """Re-bin every curve, by default with the median bounding-box extent as cell size"""
+        ids = np.fromiter(self, dtype=int)
+        if cell_size is None and len(ids):
+            boxes = self._boxes[ids]
+            extent = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+            cell_size = float(np.median(extent))
+        if cell_size:
+            self.cell_size = max(cell_size, MIN_CELL_SIZE)
+        self._cells = {}
+        self._large = set()
+        for i in ids:
+            self._insert(i)
+        self._built_for = len(ids)
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """Sorted ids of curves whose bounding box intersects the rectangle"""
+        c0, r0, c1, r1 = self._cell_range(xmin, ymin, xmax, ymax)
+        if (c1 - c0 + 1) * (r1 - r0 + 1) >= len(self._cells):
+            # The rectangle spans most of the grid: a scan of every box is cheaper
+            candidates = np.flatnonzero(self._alive[:len(self._points)])
+        else:
+            found = [self._cells.get((column, row), ())
+                     for column in range(c0, c1 + 1) for row in range(r0, r1 + 1)]
+            found = [cell for cell in found if cell]
+            if self._large:
+                found.append(list(self._large))
+            if not found:
+                return np.empty(0, dtype=int)
+            candidates = np.unique(np.concatenate(found))
+        boxes = self._boxes[candidates]
+        inside = ((boxes[:, 0] <= xmax) & (boxes[:, 2] >= xmin)
+                  & (boxes[:, 1] <= ymax) & (boxes[:, 3] >= ymin))
+        return candidates[inside]
+
+    def distances(self, x, y, ids):
+        """Distance from (x, y) to the polyline of each curve in ``ids``"""
+        if not len(ids):
+            return np.empty(0)
+        polylines = [self._points[i] for i in ids]
+        lengths = np.array([len(p) for p in polylines])
+        points = np.concatenate(polylines)
+        # Segments between consecutive points of the same curve; a single
+        # point counts as a zero-length segment
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        a = points
+        b = np.concatenate([points[1:], points[-1:]])
+        last = starts + lengths - 1
+        b[last] = a[last]
+        ab = b - a
+        length_sq = np.einsum('ij,ij->i', ab, ab)
+        q = np.array([x, y]) - a
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.clip(np.einsum('ij,ij->i', q, ab) / length_sq, 0, 1)
+        s[length_sq == 0] = 0
+        offset = q - s[:, None] * ab
+        d = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+        return np.minimum.reduceat(d, starts)
+
+    def hit_test(self, x, y, tolerance):
+        """Id of the curve passing closest to (x, y) within ``tolerance``, or None"""
+        ids = self.query(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+        if not len(ids):
+            return None
+        d = self.distances(x, y, ids)
+        nearest = int(np.argmin(d))
+        return int(ids[nearest]) if d[nearest] <= tolerance else None
+
+
+class PolylineLOD:
+    """Plot samples of one parametric curve at several zoom levels.
+
+    Samples for a level are within the plot tolerance at that level's
+    scale, which is rounded up from the requested one, so any scale maps to
+    one cached level. A missing level is derived from the nearest cached
+    one: a finer level up to LOD_REUSE levels away is used as it is, a
+    farther one is thinned by RDP without evaluating the curve, and a
+    coarser one seeds the refinement so only new midpoints are evaluated.
+    Only ``levels`` levels are kept, dropping the one farthest from the
+    level last asked for.
+    """
+
+    def __init__(self, evaluate, seeds, tolerance=PLOT_TOLERANCE, levels=LOD_LEVELS):
+        self.evaluate = evaluate
+        self.seeds = np.union1d(np.linspace(0.0, 1.0, PLOT_MIN_SAMPLES + 1), np.clip(seeds, 0.0, 1.0))
+        self.tolerance = tolerance
+        self.levels = levels
+        self._samples = {}  # level -> (t, xy)
+
+    @classmethod
+    def from_splines(cls, x_spline, y_spline, tolerance=PLOT_TOLERANCE):
+        return cls(lambda t: (x_spline(t), y_spline(t)), spline_seeds(x_spline), tolerance)
+
+    def __len__(self):
+        return len(self._samples)
+
+    @property
+    def nbytes(self):
+        return sum(t.nbytes + xy.nbytes for t, xy in self._samples.values())
+
+    def cached(self, scale):
+        """The cached polyline nearest to ``scale``'s level, without computing anything, or None"""
+        if not self._samples:
+            return None
+        level = zoom_level(scale)
+        nearest = min(self._samples, key=lambda cached: (abs(cached - level), -cached))
+        return self._samples[nearest][1]
+
+    def polyline(self, scale):
+        """(N, 2) samples within the tolerance at ``scale`` pixels per unit"""
+        level = zoom_level(scale)
+        if level not in self._samples:
+            finer = [cached for cached in self._samples if level < cached <= level + LOD_REUSE]
+            if finer:
+                return self._samples[min(finer)][1]
+            self._samples[level] = self._derive(level)
+            if len(self._samples) > self.levels:
+                del self._samples[max(self._samples, key=lambda cached: abs(cached - level))]
+        return self._samples[level][1]
+
+    def _derive(self, level):
+        scale = level_scale(level)
+        finer = [cached for cached in self._samples if cached > level]
+        if finer:
+            # A finer polyline is within tolerance * scale/finer_scale here,
+            # which leaves the rest of the tolerance for thinning it
+            t, xy = self._samples[min(finer)]
+            slack = self.tolerance * (1.0 - scale / level_scale(min(finer)))
+            keep = simplify_rdp(xy * scale, slack)
+            return t[keep], xy[keep]
+        if self._samples:
+            t, xy = self._samples[max(self._samples)]
+        else:
+            t = self.seeds
+            xy = np.column_stack(self.evaluate(t))
+        return refine_samples(self.evaluate, t, xy, scale, self.tolerance)
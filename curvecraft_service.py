@@ -0,0 +1,574 @@
+"""Bulk evaluation of fitted curves, in process or over a local socket.
+
+:class:`CurveEvaluator` evaluates many curves at a shared array of
+parameters ``t``. Curves are grouped by spline segment count (and, for the
+Fourier model, by harmonic count) so each group is evaluated with a few
+array operations instead of a Python loop over curves; large requests are
+split across a thread pool. Results are ``(curves, len(t))`` arrays::
+
+    evaluator = CurveEvaluator.from_store(CurveStore('corpus.ccf'))
+    result = evaluator.evaluate(t, curves=[3, 17], derivatives=1, curvature=True)
+    result['x'], result['dx'], result['curvature']
+
+The same evaluator can be served over HTTP on localhost or a Unix socket
+and benchmarked from a client::
+
+    python curvecraft.py serve corpus.ccf --port 8765
+    python curvecraft_service.py bench --url http://127.0.0.1:8765 --points 100000
+
+``POST /evaluate`` takes the options as query parameters (``curves=1,2,3``,
+``derivatives``, ``curvature``, ``model``, ``harmonics``) and ``t`` as raw
+little-endian float64, and answers with the arrays named in ``X-Arrays``
+concatenated in that order, each shaped ``X-Shape``. A JSON body
+(``{"t": [...], "curves": [...], ...}``) gets a JSON answer instead.
+``GET /curves`` describes the loaded curves.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from curvecraft_engine import (BASIS_MAX_ELEMENTS, DEFAULT_HARMONICS, fourier_basis,
+                               fourier_coefficients, max_harmonics)
+from curvecraft_store import CLOSED, CurveStore
+
+DEFAULT_PORT = 8765
+CHUNK_ELEMENTS = 1 << 18  # curve x parameter values per task
+PARALLEL_ELEMENTS = 1 << 20  # smaller requests are evaluated on the calling thread
+MODELS = ('spline', 'fourier')
+
+
+def _derivative_weights(weights):
+    """Weights of the derivative of a series in fourier_basis column order"""
+    k = 2 * np.pi * np.arange(1, (weights.shape[-1] - 1) // 2 + 1)
+    result = np.zeros_like(weights)
+    result[..., 1::2] = k * weights[..., 2::2]
+    result[..., 2::2] = -k * weights[..., 1::2]
+    return result
+
+
+def _curvature(dx, dy, ddx, ddy):
+    speed_sq = dx**2 + dy**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (dx * ddy - dy * ddx) / speed_sq**1.5
+
+
+class _SplineGroup:
+    """Curves with the same number of spline segments, stacked"""
+
+    def __init__(self, members, knots, x_c, y_c, closed):
+        self.members = np.asarray(members)
+        self.knots = np.asarray(knots)    # (G, k + 1)
+        self.coefficients = (np.asarray(x_c), np.asarray(y_c))  # (G, 4, k) each
+        self.closed = np.asarray(closed)
+
+    def evaluate(self, rows, t, order):
+        knots = self.knots[rows]
+        start, end = knots[:, :1], knots[:, -1:]
+        outside = len(t) and (t.min() < start.min() or t.max() > end.max())
+        t = np.broadcast_to(t, (len(rows), len(t)))
+        # Closed curves wrap around; open ones extrapolate their end segments
+        if outside and self.closed[rows].any():
+            t = np.where(self.closed[rows, None], start + np.mod(t - start, end - start), t)
+
+        # One searchsorted over every row: shift row i's knots and parameters
+        # by i * width so the rows stay sorted one after another
+        segments = knots.shape[1] - 1
+        width = np.ptp(knots) + 1.0
+        shift = np.arange(len(rows))[:, None] * width
+        interior = (knots[:, 1:-1] + shift).ravel()
+        clipped = np.clip(t, start, end) + shift
+        segment = (np.searchsorted(interior, clipped.ravel(), side='right').reshape(t.shape)
+                   - np.arange(len(rows))[:, None] * (segments - 1))
+        s = t - np.take_along_axis(knots, segment, axis=1)
+
+        values = []
+        for coefficients in self.coefficients:
+            c0, c1, c2, c3 = (np.take_along_axis(coefficients[rows, j], segment, axis=1)
+                              for j in range(4))
+            derivatives = [((c0 * s + c1) * s + c2) * s + c3]
+            if order >= 1:
+                derivatives.append((3 * c0 * s + 2 * c1) * s + c2)
+            if order >= 2:
+                derivatives.append(6 * c0 * s + 2 * c1)
+            values.append(derivatives)
+        return values
+
+
+class _FourierGroup:
+    """Curves truncated to the same harmonic count, as stacked basis weights"""
+
+    def __init__(self, members, weights):
+        self.members = np.asarray(members)
+        self.weights = weights  # (x, y), each (G, 2h + 1)
+
+    def evaluate(self, rows, t, order, basis):
+        values = []
+        for weights in self.weights:
+            weights = weights[rows]
+            derivatives = [weights @ basis.T]
+            for _ in range(order):
+                weights = _derivative_weights(weights)
+                derivatives.append(weights @ basis.T)
+            values.append(derivatives)
+        return values
+
+
+class CurveEvaluator:
+    """Batched evaluation of a fixed library of curves.
+
+    ``curves`` is a sequence of dicts with ``t``, ``x_c`` and ``y_c`` (knots
+    and spline coefficients), ``closed``, and for closed curves the spectrum
+    dict as ``fourier``, or None. Use :meth:`from_fits` or :meth:`from_store`
+    to build one. Evaluation only needs NumPy.
+    """
+
+    def __init__(self, curves, workers=None):
+        self.curves = list(curves)
+        self.workers = workers or os.cpu_count()
+        self._pool = None
+        self._fourier_groups = {}
+        self._lock = threading.Lock()
+
+        by_segments = {}
+        for i, curve in enumerate(self.curves):
+            by_segments.setdefault(len(curve['t']) - 1, []).append(i)
+        self.spline_groups = []
+        for members in by_segments.values():
+            curves = [self.curves[i] for i in members]
+            self.spline_groups.append(_SplineGroup(
+                members, [c['t'] for c in curves], [c['x_c'] for c in curves],
+                [c['y_c'] for c in curves], [c['closed'] for c in curves]))
+
+    @classmethod
+    def from_fits(cls, fits, workers=None):
+        """Evaluator over CurveFit objects"""
+        return cls([{'t': fit.t, 'x_c': fit.x_spline.c, 'y_c': fit.y_spline.c,
+                     'closed': fit.is_closed, 'fourier': fit.fourier} for fit in fits], workers)
+
+    @classmethod
+    def from_store(cls, store, workers=None):
+        """Evaluator over every curve in a CurveStore, read straight from its mapping"""
+        curves = []
+        for i, row in enumerate(store.index):
+            arrays = store.arrays(i)
+            fourier = None
+            if arrays['x_fft'] is not None:
+                fourier = {'x_fft': arrays['x_fft'], 'y_fft': arrays['y_fft'],
+                           'n': int(row['samples'])}
+            curves.append({'t': arrays['t'], 'x_c': arrays['x_c'], 'y_c': arrays['y_c'],
+                           'closed': bool(row['flags'] & CLOSED), 'fourier': fourier})
+        return cls(curves, workers)
+
+    def __len__(self):
+        return len(self.curves)
+
+    def describe(self):
+        """Counts of curves per spline segment count, for GET /curves"""
+        return {
+            'count': len(self.curves),
+            'closed': sum(bool(c['closed']) for c in self.curves),
+            'segments': {str(len(g.knots[0]) - 1): len(g.members) for g in self.spline_groups},
+        }
+
+    def fourier_groups(self, harmonics=None):
+        """Closed curves grouped by their harmonic count once truncated to ``harmonics``.
+
+        ``None`` keeps every stored harmonic, or DEFAULT_HARMONICS of a full
+        spectrum. Groups are built once per ``harmonics`` and reused.
+        """
+        with self._lock:
+            groups = self._fourier_groups.get(harmonics)
+        if groups is not None:
+            return groups
+
+        by_harmonics = {}
+        for i, curve in enumerate(self.curves):
+            fourier = curve['fourier']
+            if fourier is None:
+                continue
+            limit = max_harmonics(fourier)
+            if harmonics is not None:
+                h = min(harmonics, limit)
+            elif len(fourier['x_fft']) > fourier['n'] // 2:  # a full spectrum
+                h = min(DEFAULT_HARMONICS, limit)
+            else:
+                h = limit
+            by_harmonics.setdefault(h, []).append(i)
+
+        groups = []
+        for h, members in by_harmonics.items():
+            weights = np.empty((2, len(members), 2 * h + 1))
+            for row, i in enumerate(members):
+                a, b, c, d = fourier_coefficients(self.curves[i]['fourier'], h)
+                weights[0, row, 0], weights[1, row, 0] = a[0], c[0]
+                weights[0, row, 1::2], weights[0, row, 2::2] = a[1:], b[1:]
+                weights[1, row, 1::2], weights[1, row, 2::2] = c[1:], d[1:]
+            groups.append(_FourierGroup(members, (weights[0], weights[1])))
+        with self._lock:
+            self._fourier_groups[harmonics] = groups
+        return groups
+
+    def evaluate(self, t, curves=None, derivatives=0, curvature=False, model='spline',
+                 harmonics=None):
+        """Evaluate ``curves`` (indices, default all) at every value of ``t``.
+
+        Returns a dict of ``(len(curves), len(t))`` arrays: ``x`` and ``y``,
+        ``dx``/``dy`` for ``derivatives >= 1``, ``ddx``/``ddy`` for
+        ``derivatives >= 2`` and signed ``curvature`` if asked for. With
+        ``model='fourier'`` the truncated Fourier series is evaluated
+        instead of the spline; open curves have no series and come out NaN.
+        """
+        if model not in MODELS:
+            raise ValueError(f"Unknown model: {model!r}")
+        if derivatives not in (0, 1, 2):
+            raise ValueError("derivatives must be 0, 1 or 2")
+        t = np.ascontiguousarray(t, dtype=float).ravel()
+        ids = np.arange(len(self.curves)) if curves is None else np.asarray(curves, dtype=int)
+        if len(ids) and (ids.min() < 0 or ids.max() >= len(self.curves)):
+            raise ValueError(f"curve indices must be in [0, {len(self.curves)})")
+        order = 2 if curvature else derivatives
+        # Each curve is evaluated once; repeats are copied out at the end
+        unique, inverse = np.unique(ids, return_inverse=True)
+
+        names = ['x', 'y']
+        if order >= 1:
+            names += ['dx', 'dy']
+        if order >= 2:
+            names += ['ddx', 'ddy']
+        out = {name: np.full((len(unique), len(t)), np.nan) for name in names}
+
+        position = np.full(len(self.curves), -1)
+        position[unique] = np.arange(len(unique))
+        groups = self.spline_groups if model == 'spline' else self.fourier_groups(harmonics)
+        tasks = []
+        for group in groups:
+            selected = np.flatnonzero(position[group.members] >= 0)
+            if not len(selected) or not len(t):
+                continue
+            columns = min(len(t), max(256, CHUNK_ELEMENTS // len(selected)))
+            if model == 'fourier':
+                columns = min(columns, max(1, BASIS_MAX_ELEMENTS // group.weights[0].shape[1]))
+            rows = max(1, CHUNK_ELEMENTS // columns)
+            for r in range(0, len(selected), rows):
+                for c in range(0, len(t), columns):
+                    tasks.append((group, selected[r:r + rows], slice(c, c + columns)))
+
+        def run(task):
+            group, rows, columns = task
+            if model == 'spline':
+                values = group.evaluate(rows, t[columns], order)
+            else:
+                whole = columns.start == 0 and columns.stop >= len(t)
+                basis = fourier_basis(t[columns], (group.weights[0].shape[1] - 1) // 2, cache=whole)
+                values = group.evaluate(rows, t[columns], order, basis)
+            target = position[group.members[rows]]
+            for level, (x, y) in enumerate(zip(*values)):
+                out[names[2 * level]][target, columns] = x
+                out[names[2 * level + 1]][target, columns] = y
+
+        if len(tasks) > 1 and len(unique) * len(t) >= PARALLEL_ELEMENTS:
+            list(self.pool.map(run, tasks))
+        else:
+            for task in tasks:
+                run(task)
+
+        if curvature:
+            out['curvature'] = _curvature(out['dx'], out['dy'], out['ddx'], out['ddy'])
+            for name in names[2 * derivatives + 2:]:
+                del out[name]
+        if not np.array_equal(unique, ids):
+            out = {name: values[inverse] for name, values in out.items()}
+        return out
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def _parse_options(params):
+    """Evaluation keyword arguments from query parameters or a JSON body"""
+    options = {}
+    curves = params.get('curves')
+    if curves not in (None, '', []):
+        if isinstance(curves, str):
+            curves = curves.split(',')
+        options['curves'] = [int(c) for c in curves]
+    if params.get('derivatives') is not None:
+        options['derivatives'] = int(params['derivatives'])
+    if params.get('curvature') is not None:
+        options['curvature'] = str(params['curvature']).lower() in ('1', 'true', 'yes')
+    if params.get('model') is not None:
+        options['model'] = str(params['model'])
+    if params.get('harmonics') not in (None, ''):
+        options['harmonics'] = int(params['harmonics'])
+    return options
+
+
+class EvaluationHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections open between requests
+    # Headers and body go out in separate writes; with Nagle's algorithm the
+    # body then waits for the client's delayed ACK, about 40 ms per request
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if urlsplit(self.path).path != '/curves':
+            return self._send_json({'error': f"not found: {self.path}"}, 404)
+        self._send_json(self.server.evaluator.describe())
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/evaluate':
+            return self._send_json({'error': f"not found: {self.path}"}, 404)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        as_json = self.headers.get('Content-Type', '').startswith('application/json')
+        try:
+            if as_json:
+                params = json.loads(body or b'{}')
+                t = params.get('t', [])
+            else:
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                t = np.frombuffer(body, dtype='<f8')
+            result = self.server.evaluator.evaluate(t, **_parse_options(params))
+        except (ValueError, TypeError, KeyError) as e:
+            return self._send_json({'error': str(e)}, 400)
+
+        if as_json:
+            return self._send_json({name: array.tolist() for name, array in result.items()})
+        names = list(result)
+        shape = result['x'].shape
+        payload = b''.join(np.ascontiguousarray(result[name], dtype='<f8').tobytes()
+                           for name in names)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('X-Arrays', ','.join(names))
+        self.send_header('X-Shape', ','.join(map(str, shape)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, data, status=200):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class EvaluationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, evaluator, verbose=False):
+        self.evaluator = evaluator
+        self.verbose = verbose
+        super().__init__(address, EvaluationHandler)
+
+
+class _UnixEvaluationHandler(EvaluationHandler):
+    disable_nagle_algorithm = False  # TCP_NODELAY doesn't apply to Unix sockets
+
+
+class UnixEvaluationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, evaluator, verbose=False):
+        self.evaluator = evaluator
+        self.verbose = verbose
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _UnixEvaluationHandler)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class EvaluationClient:
+    """Client for a running evaluation server.
+
+    ``url`` is ``http://host:port`` or ``unix:/path/to/socket``. One client
+    keeps one connection open, so use a client per thread.
+    """
+
+    def __init__(self, url, timeout=60):
+        if url.startswith('unix:'):
+            self.connection = _UnixConnection(url[len('unix:'):], timeout)
+        else:
+            parts = urlsplit(url)
+            self.connection = http.client.HTTPConnection(parts.hostname, parts.port or DEFAULT_PORT,
+                                                         timeout=timeout)
+
+    def _request(self, method, path, body=None, headers=None):
+        self.connection.request(method, path, body, headers or {})
+        response = self.connection.getresponse()
+        data = response.read()
+        if response.status != 200:
+            raise ValueError(json.loads(data).get('error', f"HTTP {response.status}"))
+        return response, data
+
+    def describe(self):
+        return json.loads(self._request('GET', '/curves')[1])
+
+    def evaluate(self, t, curves=None, derivatives=0, curvature=False, model='spline',
+                 harmonics=None):
+        """Same arguments and result as CurveEvaluator.evaluate"""
+        query = f"derivatives={derivatives}&curvature={int(curvature)}&model={model}"
+        if curves is not None:
+            query += "&curves=" + ",".join(map(str, curves))
+        if harmonics is not None:
+            query += f"&harmonics={harmonics}"
+        body = np.ascontiguousarray(t, dtype='<f8').tobytes()
+        response, data = self._request('POST', f"/evaluate?{query}", body,
+                                       {'Content-Type': 'application/octet-stream'})
+        names = response.getheader('X-Arrays').split(',')
+        shape = tuple(int(n) for n in response.getheader('X-Shape').split(','))
+        arrays = np.frombuffer(data, dtype='<f8').reshape(len(names), *shape)
+        return dict(zip(names, arrays))
+
+    def close(self):
+        self.connection.close()
+
+
+def benchmark(url, t, curves=None, requests=20, concurrency=1, **options):
+    """Send ``requests`` evaluations from ``concurrency`` client threads.
+
+    Returns latency percentiles in milliseconds and the evaluated
+    curve-points per second over the whole run.
+    """
+    latencies = []
+    evaluated = [0]
+    lock = threading.Lock()
+
+    def worker(count):
+        client = EvaluationClient(url)
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                result = client.evaluate(t, curves, **options)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    evaluated[0] += result['x'].size
+        finally:
+            client.close()
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(n,)) for n in shares if n]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    ms = np.sort(latencies) * 1e3
+    return {
+        'requests': len(ms),
+        'concurrency': concurrency,
+        'points_per_request': evaluated[0] // max(len(ms), 1),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms[-1]),
+        'points_per_second': evaluated[0] / wall,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument('store', help="curve file (.ccf) to serve")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="evaluation threads (default: all CPUs)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every request")
+
+
+def run(args):
+    start = time.perf_counter()
+    evaluator = CurveEvaluator.from_store(CurveStore(args.store), args.workers)
+    if args.unix:
+        server = UnixEvaluationServer(args.unix, evaluator, args.verbose)
+        where = f"unix:{args.unix}"
+    else:
+        server = EvaluationServer((args.host, args.port), evaluator, args.verbose)
+        where = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving {len(evaluator)} curves from {args.store} on {where}"
+          f" (loaded in {time.perf_counter() - start:.2f}s)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        evaluator.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='curvecraft_service', description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_arguments(subparsers.add_parser('serve', help="serve a curve file"))
+
+    bench_parser = subparsers.add_parser('bench', help="benchmark a running server")
+    bench_parser.add_argument('--url', default=f"http://127.0.0.1:{DEFAULT_PORT}",
+                              help="http://host:port or unix:/path (default: %(default)s)")
+    bench_parser.add_argument('--curves', type=int, help="evaluate the first N curves (default: all)")
+    bench_parser.add_argument('--points', type=int, default=10000,
+                              help="parameter values per request (default: 10000)")
+    bench_parser.add_argument('--requests', type=int, default=20)
+    bench_parser.add_argument('--concurrency', type=int, default=1)
+    bench_parser.add_argument('--derivatives', type=int, choices=[0, 1, 2], default=0)
+    bench_parser.add_argument('--curvature', action='store_true')
+    bench_parser.add_argument('--model', choices=MODELS, default='spline')
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        return run(args)
+
+    curves = None if args.curves is None else list(range(args.curves))
+    t = np.linspace(0, 1, args.points)
+    report = benchmark(args.url, t, curves, args.requests, args.concurrency,
+                       derivatives=args.derivatives, curvature=args.curvature, model=args.model)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""Record mouse sessions on the CurveCraft canvas and replay them for timing.
+
+A session is the stream of mouse events the drawing canvas received
+(presses, motion, releases and wheel steps) with their timestamps, plus
+the settings the app started with. Positions are stored relative to the
+axes box, so a session replays the same way at any window size. Recording
+is a flag on the app; close the window to save::
+
+    python curvecraft.py --record session.jsonl
+
+Replaying feeds the events to a fresh CurveAnalyzer through matplotlib's
+own callback dispatch, waits after each one until Tk is idle (handlers,
+idle draws and blits done), and reports per-event latency percentiles, the
+time from the first event to the last deferred render, and the stage
+timings from the profiler. Tk needs a display, so use a virtual one on
+headless machines; rendering itself is Agg either way::
+
+    xvfb-run python curvecraft_session.py replay session.jsonl -o after.json
+    python curvecraft_session.py compare before.json after.json --threshold 0.1
+
+Events are replayed back to back by default; ``--realtime`` keeps the
+recorded spacing, so coalescing of fast motion is exercised as it was live.
+Only canvas events are recorded; changes made with the other controls
+during the session are not.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from curvecraft_profile import profiler
+
+VERSION = 1
+EVENTS = ('button_press_event', 'motion_notify_event', 'button_release_event', 'scroll_event')
+EVENT_NAMES = {'button_press_event': 'press', 'motion_notify_event': 'motion',
+               'button_release_event': 'release', 'scroll_event': 'scroll'}
+SETTLE_TIMEOUT = 60.0  # seconds to wait for deferred work after the last event
+DEFAULT_THRESHOLD = 0.10
+COMPARED = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+class SessionRecorder:
+    """Collects the canvas events of a running CurveAnalyzer"""
+
+    def __init__(self, app):
+        self.app = app
+        self.header = {
+            'version': VERSION,
+            'recorded': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'x_range': app.x_range,
+            'y_range': app.y_range,
+            'simplify': app.simplify_var.get(),
+            'spectrum': app.spectrum_var.get(),
+            'harmonics': app.harmonics_var.get(),
+            'axes_px': [app.ax.bbox.width, app.ax.bbox.height],
+        }
+        self.events = []
+        self._start = None
+        self._ids = [app.canvas.mpl_connect(name, self.record) for name in EVENTS]
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, event):
+        # Tk's own event time when there is one: callbacks run after the
+        # app's handlers, so the clock here would include their work
+        gui_time = getattr(event.guiEvent, 'time', None)
+        now = gui_time / 1000 if isinstance(gui_time, int) else time.perf_counter()
+        if self._start is None:
+            self._start = now
+        bbox = self.app.ax.bbox
+        button = event.button
+        self.events.append({
+            'event': event.name,
+            't': round(now - self._start, 6),
+            'u': (event.x - bbox.x0) / bbox.width,
+            'v': (event.y - bbox.y0) / bbox.height,
+            'button': button if button is None or isinstance(button, str) else int(button),
+            'key': event.key,
+            'step': getattr(event, 'step', 0),
+            'dblclick': getattr(event, 'dblclick', False),
+        })
+
+    def stop(self):
+        for cid in self._ids:
+            self.app.canvas.mpl_disconnect(cid)
+        self._ids = []
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.header) + '\n')
+            for event in self.events:
+                f.write(json.dumps(event) + '\n')
+
+
+def load_session(path):
+    """The (header, events) of a session file"""
+    with open(path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or 'version' not in lines[0]:
+        raise ValueError(f"Not a CurveCraft session: {path}")
+    header = lines[0]
+    if header['version'] > VERSION:
+        raise ValueError(f"{path} uses session version {header['version']}; "
+                         f"this CurveCraft reads up to version {VERSION}")
+    return header, lines[1:]
+
+
+def latency_stats(seconds):
+    ms = np.sort(seconds) * 1e3
+    if not len(ms):
+        return {'count': 0}
+    return {
+        'count': len(ms),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms[-1]),
+        'total_ms': float(ms.sum()),
+    }
+
+
+def _settle(root):
+    # One update runs everything already queued, including idle draws;
+    # timers that aren't due yet are left for the final wait
+    root.update()
+
+
+def _mouse_event(app, record):
+    from matplotlib.backend_bases import MouseButton, MouseEvent
+
+    bbox = app.ax.bbox
+    button = record['button']
+    if isinstance(button, int):
+        button = MouseButton(button)
+    return MouseEvent(record['event'], app.canvas,
+                      bbox.x0 + record['u'] * bbox.width, bbox.y0 + record['v'] * bbox.height,
+                      button=button, key=record['key'], step=record['step'],
+                      dblclick=record['dblclick'])
+
+
+def replay(path, realtime=False, settle_timeout=SETTLE_TIMEOUT):
+    """Replay a session file into a new CurveAnalyzer and return the timing report"""
+    import tkinter as tk
+    import matplotlib
+    import curvecraft_gui
+
+    header, events = load_session(path)
+    root = tk.Tk()
+    app = curvecraft_gui.CurveAnalyzer(root)
+    warnings = []
+    app.warn = lambda title, message: warnings.append(message)
+    app.simplify_var.set(header['simplify'])
+    app.spectrum_var.set(header['spectrum'])
+    app.harmonics_var.set(header['harmonics'])
+    app.set_both_ranges(header['x_range'], header['y_range'])
+    _settle(root)
+    profiler.clear()
+
+    latencies = {name: [] for name in EVENT_NAMES.values()}
+    start = time.perf_counter()
+    last = start
+    for record in events:
+        if realtime:
+            due = start + record['t']
+            while time.perf_counter() < due:
+                root.update()
+                time.sleep(min(0.001, max(due - time.perf_counter(), 0)))
+        event = _mouse_event(app, record)
+        last = time.perf_counter()
+        app.canvas.callbacks.process(event.name, event)
+        _settle(root)
+        latencies[EVENT_NAMES[record['event']]].append(time.perf_counter() - last)
+
+    # Deferred work: harmonics results, curve refinement, coalesced navigation
+    deadline = time.perf_counter() + settle_timeout
+    while app.busy() and time.perf_counter() < deadline:
+        root.update()
+        time.sleep(0.001)
+    end = time.perf_counter()
+    settled = not app.busy()
+    root.destroy()
+
+    everything = [seconds for values in latencies.values() for seconds in values]
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'tk': tk.TkVersion,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'session': {'path': path, 'events': len(events), 'realtime': realtime,
+                    'recorded': header.get('recorded')},
+        'latency': {'all': latency_stats(everything),
+                    **{name: latency_stats(values) for name, values in latencies.items() if values}},
+        'total_s': end - start,
+        'final_render_s': end - last,
+        'settled': settled,
+        'warnings': warnings,
+        'stages': profiler.summary(),
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Compare two replay reports.
+
+    Returns rows of (metric, baseline, current, ratio, regressed) for the
+    latency percentiles of each event type and the total and final render
+    times, where a regression is a slowdown by more than ``threshold``.
+    """
+    pairs = []
+    for name, stats in current['latency'].items():
+        before = baseline['latency'].get(name, {})
+        pairs += [(f"{name} {stat}", before[stat], stats[stat])
+                  for stat in COMPARED if stat in stats and stat in before]
+    pairs += [(f"{label} ms", baseline[metric] * 1e3, current[metric] * 1e3)
+              for metric, label in (('total_s', 'total'), ('final_render_s', 'final render'))]
+    rows = []
+    for metric, before, after in pairs:
+        ratio = after / before if before > 0 else float('inf')
+        rows.append((metric, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def add_arguments(parser):
+    parser.add_argument('session', help="session file recorded with --record")
+    parser.add_argument('-o', '--output', help="JSON report to write (default: stdout)")
+    parser.add_argument('--realtime', action='store_true',
+                        help="keep the recorded spacing between events")
+    parser.add_argument('--trace', metavar='PATH', help="also write a Chrome trace of the replay")
+
+
+def run(args):
+    import tkinter as tk
+
+    try:
+        report = replay(args.session, args.realtime)
+    except tk.TclError as e:
+        print(f"Replay needs a display for Tk ({e}); on a headless machine run it under xvfb-run",
+              file=sys.stderr)
+        return 2
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    stats = report['latency']['all']
+    if stats['count']:
+        print(f"{stats['count']} events: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms, "
+              f"p99 {stats['p99_ms']:.2f} ms, max {stats['max_ms']:.2f} ms; "
+              f"final render {report['final_render_s'] * 1e3:.1f} ms after the last event, "
+              f"{report['total_s']:.2f} s in total", file=sys.stderr)
+    if not report['settled']:
+        print("Deferred work was still pending when the replay gave up waiting", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='curvecraft_session', description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_arguments(subparsers.add_parser('replay', help="replay a session and report latencies"))
+
+    compare_parser = subparsers.add_parser('compare', help="compare two replay reports")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="slowdown that counts as a regression (default: 0.1 = 10%%)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'replay':
+        return run(args)
+
+    rows = compare(_load(args.baseline), _load(args.current), args.threshold)
+    regressions = 0
+    for metric, before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{metric:24s} {before:10.3f} -> {after:10.3f} ms  {ratio:6.2f}x  {flag}")
+    print(f"{len(rows)} measurements compared, {regressions} regressed by more than "
+          f"{args.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
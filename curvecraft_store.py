@@ -0,0 +1,250 @@
+"""Binary container for fitted curves with random access.
+
+A ``.ccf`` file holds any number of curves: their knots, the spline
+coefficient arrays (``spline.c``), the Fourier spectrum truncated to the
+stored harmonic count, and a JSON metadata object per curve. Layout, all
+little-endian and 8-byte aligned::
+
+    header   magic, format version, curve count, index and metadata offsets
+    records  per curve: t[k+1], x_c[4, k], y_c[4, k] float64,
+             x_fft[h+1], y_fft[h+1] complex128, metadata JSON
+    index    one INDEX_DTYPE row per curve
+    metadata JSON object describing the whole file
+
+The reader memory-maps the file, so opening it reads only the header, and
+``store[i]`` touches just the pages of curve ``i``::
+
+    with CurveWriter('corpus.ccf', metadata={'x_range': 1.2}) as writer:
+        writer.add(fit, harmonics=20, meta={'source': 'a.csv'})
+
+    store = CurveStore('corpus.ccf')
+    fit = store[123456]                       # a CurveFit
+    arrays = store.arrays(123456)             # zero-copy views, no SciPy
+    closed = store.index['flags'] & CLOSED    # the whole index as an array
+"""
+import json
+import struct
+
+import numpy as np
+
+from curvecraft_engine import (DEFAULT_HARMONICS, CurveFit, max_harmonics, truncation_errors)
+
+MAGIC = b'CCURVES\0'
+VERSION = 1
+STORE_EXTENSION = '.ccf'
+HEADER = struct.Struct('<8sIIQQQQ')  # magic, version, header size, count, index/meta offset, meta length
+HEADER_SIZE = 64
+ALIGN = 8
+
+CLOSED = 1
+
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),       # start of the curve's record
+    ('segments', '<u4'),     # spline segments k
+    ('harmonics', '<i4'),    # stored harmonics h, -1 without a spectrum
+    ('samples', '<u4'),      # FFT sample count n the spectrum came from
+    ('flags', '<u4'),
+    ('alias_error', '<f8'),
+    ('rms_error', '<f8'),    # truncation error at the stored harmonics
+    ('max_error', '<f8'),
+    ('meta_length', '<u4'),
+    ('reserved', '<u4'),
+])
+
+FLOAT = np.dtype('<f8')
+COMPLEX = np.dtype('<c16')
+
+
+def _padding(size):
+    return -size % ALIGN
+
+
+def _record_layout(segments, harmonics):
+    """Byte offsets of each array within a record, and where the metadata starts"""
+    knots = (segments + 1) * FLOAT.itemsize
+    coefficients = 4 * segments * FLOAT.itemsize
+    spectrum = max(harmonics + 1, 0) * COMPLEX.itemsize
+    layout = {'t': 0, 'x_c': knots, 'y_c': knots + coefficients,
+              'x_fft': knots + 2 * coefficients}
+    layout['y_fft'] = layout['x_fft'] + spectrum
+    layout['meta'] = layout['y_fft'] + spectrum
+    return layout
+
+
+class CurveWriter:
+    """Stream curves into a new ``.ccf`` file.
+
+    Records are written as they are added; the index and file metadata are
+    written by :meth:`close`, so a file is only readable once closed.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self._file = open(path, 'wb')
+        self._file.write(bytes(HEADER_SIZE))
+        self._offset = HEADER_SIZE
+        self._index = np.zeros(1024, dtype=INDEX_DTYPE)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def add(self, fit, harmonics=DEFAULT_HARMONICS, meta=None):
+        """Append one CurveFit, keeping ``harmonics`` terms of its spectrum.
+
+        ``meta`` is any JSON-serializable dict stored alongside the curve.
+        Returns the curve's position in the file.
+        """
+        row = np.zeros((), dtype=INDEX_DTYPE)
+        row['offset'] = self._offset
+        row['segments'] = fit.n_segments
+        row['flags'] = CLOSED if fit.is_closed else 0
+        row['harmonics'] = -1
+        arrays = [fit.t, fit.x_spline.c, fit.y_spline.c]
+        if fit.fourier is not None:
+            harmonics = min(harmonics, max_harmonics(fit.fourier))
+            rms, max_bound = truncation_errors(fit.fourier)
+            row['harmonics'] = harmonics
+            row['samples'] = fit.fourier['n']
+            row['alias_error'] = fit.fourier['alias_error']
+            row['rms_error'] = rms[harmonics]
+            row['max_error'] = max_bound[harmonics]
+            arrays += [fit.fourier['x_fft'][:harmonics + 1], fit.fourier['y_fft'][:harmonics + 1]]
+        encoded = json.dumps(meta).encode('utf-8') if meta else b''
+        row['meta_length'] = len(encoded)
+
+        size = 0
+        for array in arrays:
+            dtype = COMPLEX if np.iscomplexobj(array) else FLOAT
+            data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+            self._file.write(data)
+            size += len(data)
+        self._file.write(encoded + bytes(_padding(size + len(encoded))))
+        self._offset += size + len(encoded) + _padding(size + len(encoded))
+
+        if self._count == len(self._index):
+            self._index = np.concatenate([self._index, np.zeros_like(self._index)])
+        self._index[self._count] = row
+        self._count += 1
+        return self._count - 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._offset
+        self._file.write(self._index[:self._count].tobytes())
+        meta_offset = index_offset + self._count * INDEX_DTYPE.itemsize
+        encoded = json.dumps(self.metadata).encode('utf-8')
+        self._file.write(encoded)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, HEADER_SIZE, self._count,
+                                     index_offset, meta_offset, len(encoded)))
+        self._file.close()
+
+
+class CurveStore:
+    """Read-only, memory-mapped view of a ``.ccf`` file.
+
+    ``store[i]`` rebuilds curve ``i`` as a CurveFit whose splines are SciPy
+    ``PPoly`` objects with the stored coefficients; its spectrum only holds
+    the stored harmonics. :meth:`arrays` returns the raw arrays as views
+    into the mapping without importing SciPy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a CurveCraft curve file: {path}")
+        (_, self.version, header_size, self.count,
+         index_offset, meta_offset, meta_length) = HEADER.unpack_from(header)
+        if self.version > VERSION:
+            raise ValueError(f"{path} uses curve file version {self.version}; "
+                             f"this CurveCraft reads up to version {VERSION}")
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        self.index = self._data[index_offset:meta_offset].view(INDEX_DTYPE)
+        if len(self.index) != self.count:
+            raise ValueError(f"Truncated curve file: {path}")
+        self.metadata = json.loads(bytes(self._data[meta_offset:meta_offset + meta_length]) or b'{}')
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return self.read(i)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.read(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        # Views handed out keep the mapping alive until they are released
+        self._data = self.index = None
+
+    def _row(self, i):
+        if not -self.count <= i < self.count:
+            raise IndexError(f"curve {i} out of range for {self.count} curves")
+        return self.index[i]
+
+    def _view(self, start, dtype, count):
+        return self._data[start:start + count * dtype.itemsize].view(dtype)
+
+    def arrays(self, i):
+        """Curve ``i``'s knots, spline coefficients and spectrum as zero-copy views"""
+        row = self._row(i)
+        segments, harmonics = int(row['segments']), int(row['harmonics'])
+        offset = int(row['offset'])
+        layout = _record_layout(segments, harmonics)
+        arrays = {
+            't': self._view(offset + layout['t'], FLOAT, segments + 1),
+            'x_c': self._view(offset + layout['x_c'], FLOAT, 4 * segments).reshape(4, segments),
+            'y_c': self._view(offset + layout['y_c'], FLOAT, 4 * segments).reshape(4, segments),
+            'x_fft': None,
+            'y_fft': None,
+        }
+        if harmonics >= 0:
+            arrays['x_fft'] = self._view(offset + layout['x_fft'], COMPLEX, harmonics + 1)
+            arrays['y_fft'] = self._view(offset + layout['y_fft'], COMPLEX, harmonics + 1)
+        return arrays
+
+    def meta(self, i):
+        """The metadata dict stored with curve ``i``"""
+        row = self._row(i)
+        start = int(row['offset']) + _record_layout(int(row['segments']), int(row['harmonics']))['meta']
+        encoded = bytes(self._data[start:start + int(row['meta_length'])])
+        return json.loads(encoded) if encoded else {}
+
+    def read(self, i):
+        """Curve ``i`` as a CurveFit"""
+        from scipy.interpolate import PPoly
+
+        row = self._row(i)
+        arrays = self.arrays(i)
+        is_closed = bool(row['flags'] & CLOSED)
+        extrapolate = 'periodic' if is_closed else True
+        t = np.array(arrays['t'])
+        x_spline = PPoly(np.array(arrays['x_c']), t, extrapolate=extrapolate)
+        y_spline = PPoly(np.array(arrays['y_c']), t, extrapolate=extrapolate)
+        x = np.append(x_spline.c[-1], x_spline(t[-1]))
+        y = np.append(y_spline.c[-1], y_spline(t[-1]))
+        fourier = None
+        if arrays['x_fft'] is not None:
+            fourier = {'x_fft': np.array(arrays['x_fft']), 'y_fft': np.array(arrays['y_fft']),
+                       'n': int(row['samples']), 'alias_error': float(row['alias_error'])}
+        return CurveFit(t, x, y, x_spline, y_spline, is_closed, fourier)
@@ -0,0 +1,74 @@
+import argparse
+import io
+import json
+
+import numpy as np
+import pytest
+
+from curvecraft_batch import (BATCH_STROKES, fit_file, fit_files, harmonics_arg, read_strokes,
+                              stroke_batches)
+
+
+def test_fit_file_reports_bad_strokes_per_line(tmp_path):
+    path = tmp_path / 'strokes.jsonl'
+    good = [[0, 0], [1, 1], [2, 0], [3, 1], [4, 0], [5, 2]]
+    path.write_text('\n'.join(json.dumps(item) for item in [
+        {'id': 'missing', 'pts': good},
+        good,
+        {'points': [['a', 1], [2, 3]]},
+    ]) + '\n')
+
+    results = [(json.loads(line), ok) for line, ok in fit_file(str(path))]
+    assert [ok for _, ok in results] == [False, True, False]
+    assert results[0][0]['stroke'] == 'missing'
+    assert 'points' in results[0][0]['error']
+
+
+def test_fit_file_keeps_fitting_after_a_malformed_line(tmp_path):
+    path = tmp_path / 'strokes.jsonl'
+    good = [[0, 0], [1, 1], [2, 0], [3, 1], [4, 0], [5, 2]]
+    path.write_text('{"id": "x", "points": ' + json.dumps(good) + '}\n'
+                    '{"id": "broken", "points": [[0, 0],\n' +
+                    json.dumps(good) + '\n')
+
+    results = [(json.loads(line), ok) for line, ok in fit_file(str(path))]
+    assert [(r['stroke'], ok) for r, ok in results] == [('x', True), (1, False), (2, True)]
+    assert results[1][0]['error'].startswith("Invalid JSON on line 2")
+
+
+def write_circles(path, count):
+    th = np.linspace(0, 2 * np.pi, 60)
+    with open(path, 'w') as f:
+        for k in range(count):
+            points = (0.5 + k / (4 * count)) * np.column_stack([np.cos(th), np.sin(th)])
+            f.write(json.dumps({'id': k, 'points': points.tolist()}) + '\n')
+            if k == 4:
+                f.write('\n')
+
+
+def test_stroke_batches_cover_the_file(tmp_path):
+    path = tmp_path / 'strokes.jsonl'
+    write_circles(path, 10)
+    spans = list(stroke_batches(path, size=3))
+    assert len(spans) == 4
+    assert [s[2] for s in spans] == [0, 3, 6, 9]
+    batched = [stroke for span in spans for stroke in read_strokes(str(path), span)]
+    whole = read_strokes(str(path))
+    assert [s[0] for s in batched] == [s[0] for s in whole] == list(range(10))
+    assert all(np.array_equal(a[1], b[1]) for a, b in zip(batched, whole))
+
+
+def test_fit_files_splits_one_archive_across_workers(tmp_path):
+    path = tmp_path / 'archive.jsonl'
+    write_circles(path, 2 * BATCH_STROKES + 5)
+    serial, parallel = io.StringIO(), io.StringIO()
+    assert fit_files([str(path)], serial, workers=1) == (2 * BATCH_STROKES + 5, 0)
+    assert fit_files([str(path)], parallel, workers=2) == (2 * BATCH_STROKES + 5, 0)
+    assert parallel.getvalue() == serial.getvalue()
+
+
+def test_harmonics_arg_rejects_negative_counts():
+    assert harmonics_arg('auto') == 'auto'
+    assert harmonics_arg('0') == 0
+    with pytest.raises(argparse.ArgumentTypeError):
+        harmonics_arg('-1')
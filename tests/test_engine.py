@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+import pytest
+
+from curvecraft_engine import (POINT_HARMONICS, StreamingFitter, _segment_distances, fit_curve,
+                               simplify_visvalingam)
+
+
+def circle(n=200):
+    th = np.linspace(0, 2 * np.pi, n)
+    return 0.8 * np.column_stack([np.cos(th), np.sin(th)])
+
+
+@pytest.mark.parametrize('bad', [np.nan, np.inf, -np.inf])
+def test_fit_curve_rejects_non_finite_points(bad):
+    points = circle()
+    points[57, 1] = bad
+    with pytest.raises(ValueError, match="non-finite"):
+        fit_curve(points)
+
+
+def test_fit_curve_closed_circle():
+    fit = fit_curve(circle())
+    assert fit.is_closed
+    assert fit.fourier is not None
+
+
+@pytest.mark.parametrize('spectrum', ['lstsq', 'nudft'])
+def test_streaming_point_spectrum_matches_fit_curve(spectrum):
+    points = circle(400)
+    fitter = StreamingFitter()
+    fitter.extend(points)
+    streamed = fitter.fit(spectrum=spectrum).fourier
+    assert streamed['method'] == spectrum
+    assert len(streamed['x_fft']) == POINT_HARMONICS + 1
+    np.testing.assert_allclose(streamed['x_fft'], fit_curve(points, spectrum=spectrum).fourier['x_fft'])
+
+
+def spiral(n):
+    th = np.linspace(0, 40 * np.pi, n)
+    return 0.01 * th[:, None] * np.column_stack([np.cos(th), np.sin(th)])
+
+
+def steep_power(n):
+    x = np.linspace(0, 1, n)
+    return np.column_stack([x, x**30])
+
+
+@pytest.mark.parametrize('curve', [spiral, steep_power])
+def test_visvalingam_steadily_changing_areas_stay_fast(curve):
+    # Areas that rise along the whole stroke used to cost one pass per point
+    start = time.perf_counter()
+    keep = simplify_visvalingam(curve(100_000), 0.002)
+    assert time.perf_counter() - start < 5.0
+    assert keep[0] == 0 and keep[-1] == 99_999
+
+
+def test_visvalingam_stays_within_tolerance():
+    tolerance = 0.01
+    th = np.linspace(0, 2 * np.pi, 5000)
+    noise = np.random.default_rng(0).normal(0, tolerance / 10, (5000, 2))
+    points = np.column_stack([th / 6 - 0.5, 0.5 * np.sin(3 * th)]) + noise
+    keep = simplify_visvalingam(points, tolerance)
+    assert 2 < len(keep) < len(points) // 10
+
+    span = np.searchsorted(keep, np.arange(len(points)), side='right') - 1
+    dropped = np.setdiff1d(np.arange(len(points)), keep)
+    a, b = keep[span[dropped]], keep[span[dropped] + 1]
+    assert _segment_distances(points[dropped], points[a], points[b]).max() <= tolerance
+
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from curvecraft_gui import UpdateScheduler
+
+
+class FakeRoot:
+    """Collects root.after callbacks so a test can run the poll by hand"""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def poll(self):
+        while self.pending:
+            self.pending.pop(0)()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline
+        time.sleep(0.001)
+
+
+def test_update_scheduler_drops_results_of_superseded_requests():
+    started = {1: threading.Event(), 2: threading.Event()}
+    gates = {1: threading.Event(), 2: threading.Event()}
+    applied = []
+
+    def compute(n):
+        started[n].set()
+        gates[n].wait()
+        return n
+
+    root = FakeRoot()
+    scheduler = UpdateScheduler(root, compute, applied.append)
+    scheduler.submit(1)
+    started[1].wait(5.0)
+    scheduler.submit(2)  # while 1 is still computing
+    gates[1].set()
+    wait_until(lambda: scheduler._done == 1)
+    root.pending.pop(0)()
+    assert applied == []
+
+    gates[2].set()
+    wait_until(lambda: scheduler._done == 2)
+    root.poll()
+    assert applied == [2]
+    assert not scheduler.busy
@@ -0,0 +1,23 @@
+import numpy as np
+
+from curvecraft_scene import MAX_BOX_CELLS, Scene
+
+
+def ring(x, y, r, n=100):
+    th = np.linspace(0, 2 * np.pi, n)
+    return np.column_stack([x + r * np.cos(th), y + r * np.sin(th)])
+
+
+def test_large_curve_stays_out_of_the_grid():
+    scene = Scene()
+    rng = np.random.default_rng(1)
+    small = [scene.add(ring(*rng.uniform(-1, 1, 2), 0.002)) for _ in range(40)]
+    big = scene.add(ring(0, 0, 2))
+
+    assert len(scene._cells) <= MAX_BOX_CELLS * len(small)
+    assert big in scene.query(1.9, -0.1, 2.1, 0.1)
+    assert scene.hit_test(2.0, 0.0, 0.02) == big
+
+    scene.remove(big)
+    assert big not in scene.query(-3, -3, 3, 3)
+    assert scene.hit_test(2.0, 0.0, 0.02) is None
@@ -0,0 +1,18 @@
+import numpy as np
+
+from curvecraft_engine import fit_curve
+from curvecraft_service import CurveEvaluator
+
+
+def test_evaluate_repeated_curve_ids():
+    th = np.linspace(0, 2 * np.pi, 200)
+    fits = [fit_curve(r * np.column_stack([np.cos(th), np.sin(th)])) for r in (0.3, 0.6, 0.9)]
+    evaluator = CurveEvaluator.from_fits(fits, workers=1)
+    t = np.linspace(0, 1, 50)
+
+    result = evaluator.evaluate(t, curves=[2, 2, 0], derivatives=1)
+    single = evaluator.evaluate(t, curves=[0, 2], derivatives=1)
+    for name in ('x', 'y', 'dx', 'dy'):
+        assert not np.isnan(result[name]).any()
+        np.testing.assert_array_equal(result[name], single[name][[1, 1, 0]])
+    np.testing.assert_allclose(result['x'][2], fits[0].x_spline(t))